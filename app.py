@@ -1,29 +1,140 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session, send_file, abort, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.orm import relationship, aliased
+from sqlalchemy import func, case, select, text, event, update, insert, or_, and_, literal_column
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.exc import IntegrityError, OperationalError
+import sqlite3
+from datetime import date, datetime, timedelta
 import PyPDF2
 from werkzeug.utils import secure_filename
 from flask_migrate import Migrate
 from flask_moment import Moment
 import json
+import re
 import random
 import requests
 from datetime import datetime
 import uuid
+import hashlib
 from urllib.parse import urlencode
 import copy
+import threading
+import queue
+import time
+import gzip
+import zlib
+import shutil
+import atexit
+import multiprocessing
+import mmap
+import struct
+import sys
+import click
+from array import array
+from collections import OrderedDict
+from itertools import islice
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+try:
+    import fcntl
+except ImportError:  # Windows, spools of other processes are not recovered
+    fcntl = None
+try:
+    import orjson
+except ImportError:  # Optional, JSON is encoded with the stdlib json module without it
+    orjson = None
+try:
+    import zstandard
+except ImportError:  # Optional, exports are only offered gzip-compressed without it
+    zstandard = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///forms.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///forms.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Some hosts still hand out the deprecated postgres:// scheme
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://' + app.config['SQLALCHEMY_DATABASE_URI'][len('postgres://'):]
+
+# SQLite connection profile, applied as PRAGMAs on every new connection.
+# WAL lets readers run alongside the single writer and the busy timeout makes
+# concurrent writers wait for the lock instead of failing with "database is locked".
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', -64 * 1024))  # Negative values are KiB
+app.config['SQLITE_TEMP_STORE'] = os.environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'connect_args': {'timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}
+    }
+else:
+    # Pooled connections for server databases such as Postgres
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True
+    }
+
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.jinja_env.filters['fromjson'] = json.loads
+app.config['FORM_SCHEMA_CACHE_SIZE'] = int(os.environ.get('FORM_SCHEMA_CACHE_SIZE', 256))  # Compiled forms kept in memory
+app.config['RESPONSE_EXPORT_BATCH_SIZE'] = int(os.environ.get('RESPONSE_EXPORT_BATCH_SIZE', 200))  # Responses exported per batch
+app.config['RESPONSE_EXPORT_INTERVAL'] = float(os.environ.get('RESPONSE_EXPORT_INTERVAL', 2))  # Seconds to wait for a batch to fill
+app.config['RESPONSE_EXPORT_SWEEP_INTERVAL'] = float(os.environ.get('RESPONSE_EXPORT_SWEEP_INTERVAL', 60))  # Seconds between scans for unexported responses
+app.config['SUBMIT_GROUP_COMMIT'] = os.environ.get('SUBMIT_GROUP_COMMIT', '0') == '1'  # Commit concurrent submissions together in one transaction
+app.config['SUBMIT_GROUP_COMMIT_WINDOW'] = float(os.environ.get('SUBMIT_GROUP_COMMIT_WINDOW', 0.005))  # Seconds to wait for more submissions to join a group
+app.config['SUBMIT_GROUP_COMMIT_MAX'] = int(os.environ.get('SUBMIT_GROUP_COMMIT_MAX', 64))  # Submissions committed per group
+app.config['SUBMIT_GROUP_COMMIT_TIMEOUT'] = float(os.environ.get('SUBMIT_GROUP_COMMIT_TIMEOUT', 30))  # Seconds a request waits for its group to commit
+app.config['EXPORT_STREAM_BATCH_SIZE'] = int(os.environ.get('EXPORT_STREAM_BATCH_SIZE', 500))  # Responses fetched per query when streaming an export
+app.config['EXPORT_GZIP_LEVEL'] = int(os.environ.get('EXPORT_GZIP_LEVEL', 6))  # Compression level of gzip-encoded export downloads
+app.config['EXPORT_ZSTD_LEVEL'] = int(os.environ.get('EXPORT_ZSTD_LEVEL', 3))  # Compression level of zstd-encoded export downloads (needs the zstandard package)
+app.config['RESPONSE_SUMMARY_CACHE_SIZE'] = int(os.environ.get('RESPONSE_SUMMARY_CACHE_SIZE', 128))  # Forms whose response analytics are kept in memory
+app.config['RESPONSE_EXPORT_FOLDER'] = os.environ.get('RESPONSE_EXPORT_FOLDER', os.path.join('exports', 'survey_responses'))  # Per-response JSON exports, bucketed by form and submission date
+app.config['RESPONSE_EXPORT_BACKEND'] = os.environ.get('RESPONSE_EXPORT_BACKEND', 'files')  # 'files': one JSON file per response, 'bundle': rolling per-form JSONL bundles
+app.config['RESPONSE_EXPORT_BUNDLE_MAX_BYTES'] = int(os.environ.get('RESPONSE_EXPORT_BUNDLE_MAX_BYTES', 64 * 1024 * 1024))  # Start a new bundle when the current one reaches this size
+app.config['RESPONSE_EXPORT_BUNDLE_ROTATE_SECONDS'] = int(os.environ.get('RESPONSE_EXPORT_BUNDLE_ROTATE_SECONDS', 24 * 60 * 60))  # Start a new bundle when the current one is this old
+app.config['RESPONSE_SNAPSHOT_FOLDER'] = os.environ.get('RESPONSE_SNAPSHOT_FOLDER', os.path.join('exports', 'snapshots'))  # Columnar response snapshots for offline reporting
+app.config['RESPONSE_SNAPSHOT_BATCH_SIZE'] = int(os.environ.get('RESPONSE_SNAPSHOT_BATCH_SIZE', 5000))  # Responses appended to a snapshot per query
+app.config['RESPONSES_PAGE_SIZE'] = int(os.environ.get('RESPONSES_PAGE_SIZE', 50))  # Rows per page in the responses grid
+app.config['PARSE_CACHE_FOLDER'] = os.environ.get('PARSE_CACHE_FOLDER', os.path.join('uploads', 'parsed'))  # Parsed PDFs and mindmaps cached on disk by content hash
+app.config['PARSE_CACHE_MAX_BYTES'] = int(os.environ.get('PARSE_CACHE_MAX_BYTES', 256 * 1024 * 1024))  # Least recently used files are pruned from PARSE_CACHE_FOLDER above this size
+app.config['PDF_EXTRACTION_PROCESSES'] = int(os.environ.get('PDF_EXTRACTION_PROCESSES', min(4, os.cpu_count() or 1)))  # Processes extracting PDF pages
+app.config['PDF_EXTRACTION_CHUNK_PAGES'] = int(os.environ.get('PDF_EXTRACTION_CHUNK_PAGES', 10))  # Pages extracted per process task
+app.config['PDF_EXTRACTION_STALE_SECONDS'] = int(os.environ.get('PDF_EXTRACTION_STALE_SECONDS', 600))  # Requeue running jobs without progress for this long
+app.config['PDF_EXTRACTION_MAX_TASKS_PER_CHILD'] = int(os.environ.get('PDF_EXTRACTION_MAX_TASKS_PER_CHILD', 20))  # Recycle extraction processes to give PyPDF2 memory back
+app.config['PDF_MAX_PAGES'] = int(os.environ.get('PDF_MAX_PAGES', 500))  # Longer PDFs are rejected
+app.config['PDF_MAX_PAGE_CHARS'] = int(os.environ.get('PDF_MAX_PAGE_CHARS', 100000))  # Page text beyond this is ignored
+app.config['PDF_MAX_QUESTIONS'] = int(os.environ.get('PDF_MAX_QUESTIONS', 1000))  # Questions imported per PDF, extraction stops here
+app.config['POSTBACK_DASHBOARD_LOGS'] = int(os.environ.get('POSTBACK_DASHBOARD_LOGS', 20))  # Latest logs shown per form on the postback dashboard
+app.config['POSTBACK_INGEST_ASYNC'] = os.environ.get('POSTBACK_INGEST_ASYNC', '1') == '1'  # Spool postbacks and store them in batches from a background thread
+app.config['POSTBACK_SPOOL_FOLDER'] = os.environ.get('POSTBACK_SPOOL_FOLDER', 'postback_spool')  # Durable spool of accepted postbacks not yet stored
+app.config['POSTBACK_SPOOL_FSYNC'] = os.environ.get('POSTBACK_SPOOL_FSYNC', '0') == '1'  # fsync the spool before acknowledging (survives power loss, not just crashes)
+app.config['POSTBACK_SPOOL_MAX_BYTES'] = int(os.environ.get('POSTBACK_SPOOL_MAX_BYTES', 16 * 1024 * 1024))  # Truncate the spool once it is stored and this large
+app.config['POSTBACK_BATCH_WINDOW'] = float(os.environ.get('POSTBACK_BATCH_WINDOW', 0.05))  # Seconds to wait for more postbacks to join a batch
+app.config['POSTBACK_BATCH_MAX'] = int(os.environ.get('POSTBACK_BATCH_MAX', 1000))  # Postbacks stored per transaction
+app.config['POSTBACK_TRACKING_CACHE_SIZE'] = int(os.environ.get('POSTBACK_TRACKING_CACHE_SIZE', 10000))  # tracking_id -> form_id entries kept in memory
+app.config['POSTBACK_TRACKING_CACHE_TTL'] = float(os.environ.get('POSTBACK_TRACKING_CACHE_TTL', 60))  # Seconds a cached tracking_id is trusted before it is looked up again
+app.config['POSTBACK_DEDUP_CACHE_SIZE'] = int(os.environ.get('POSTBACK_DEDUP_CACHE_SIZE', 100000))  # Recent transaction IDs remembered to reject retried postbacks
+app.config['POSTBACK_DEDUP_BLOOM_BITS'] = int(os.environ.get('POSTBACK_DEDUP_BLOOM_BITS', 8 * 1024 * 1024))  # Size of the Bloom filter of transaction IDs seen by this process
+app.config['POSTBACK_DEDUP_BLOOM_HASHES'] = int(os.environ.get('POSTBACK_DEDUP_BLOOM_HASHES', 7))  # Hash functions per Bloom filter key
+app.config['POSTBACK_LOG_FILE'] = os.environ.get('POSTBACK_LOG_FILE', 'postback_logs.jsonl')  # Append-only postback log (one JSON object per line)
+app.config['POSTBACK_LOG_MAX_BYTES'] = int(os.environ.get('POSTBACK_LOG_MAX_BYTES', 64 * 1024 * 1024))  # Rotate when the log reaches this size
+app.config['POSTBACK_LOG_ROTATE_SECONDS'] = int(os.environ.get('POSTBACK_LOG_ROTATE_SECONDS', 24 * 60 * 60))  # Rotate when the log is this old
+app.config['POSTBACK_LOG_COMPRESS'] = os.environ.get('POSTBACK_LOG_COMPRESS', '1') == '1'  # Gzip rotated segments
+app.config['JSON_ENCODER'] = os.environ.get('JSON_ENCODER', 'orjson' if orjson is not None else 'stdlib')  # 'orjson' or 'stdlib', used by json_dumps()/json_loads() and jsonify
 
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -43,15 +154,77 @@ def inject_csrf_token():
     # We're using the _method approach for form security instead
     return {'csrf_token': 'dummy_token'}
 
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite connection profile to each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}")
+    cursor.execute(f"PRAGMA mmap_size={app.config['SQLITE_MMAP_SIZE']}")
+    cursor.execute(f"PRAGMA cache_size={app.config['SQLITE_CACHE_SIZE']}")
+    cursor.execute(f"PRAGMA temp_store={app.config['SQLITE_TEMP_STORE']}")
+    cursor.close()
+
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# JSON serialization
+#
+# Exports, postbacks and API responses are encoded with json_dumps()/json_loads(), which
+# use orjson when it is installed and the stdlib json module otherwise. Both produce the
+# same compact (or 2-space indented) UTF-8 JSON and encode dates and datetimes as ISO 8601.
+
+def json_default(value):
+    """Encode types JSON has no notation for, anything Flask's jsonify accepts is accepted"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+if app.config['JSON_ENCODER'] == 'orjson':
+    def json_dumps_bytes(obj, indent=False, sort_keys=False):
+        """Serialize obj to UTF-8 encoded JSON"""
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=json_default, option=option)
+
+    json_loads = orjson.loads
+else:
+    def json_dumps_bytes(obj, indent=False, sort_keys=False):
+        """Serialize obj to UTF-8 encoded JSON"""
+        return json.dumps(
+            obj, default=json_default, ensure_ascii=False, sort_keys=sort_keys,
+            indent=2 if indent else None, separators=(',', ': ') if indent else (',', ':')
+        ).encode('utf-8')
+
+    json_loads = json.loads
+
+def json_dumps(obj, indent=False, sort_keys=False):
+    """Serialize obj to a JSON string"""
+    return json_dumps_bytes(obj, indent, sort_keys).decode('utf-8')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider for jsonify and request.get_json() backed by json_dumps()/json_loads()"""
+
+    def dumps(self, obj, **kwargs):
+        return json_dumps(obj, indent=bool(kwargs.get('indent')), sort_keys=kwargs.get('sort_keys', self.sort_keys))
+
+    def loads(self, s, **kwargs):
+        return json_loads(s)
+
+app.json = FastJSONProvider(app)
+
 def fromjson_filter(s):
     try:
-        return json.loads(s)
+        return json_loads(s)
     except Exception:
         return []
 app.jinja_env.filters['fromjson'] = fromjson_filter
@@ -86,7 +259,7 @@ class Form(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_form_user'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_form_user'), nullable=False, index=True)
     company_id = db.Column(db.Integer, db.ForeignKey('company.id', name='fk_form_company'), nullable=True)
     questions = db.relationship('Question', backref='form', lazy=True, cascade='all, delete-orphan')
     responses = db.relationship('Response', backref='form', lazy=True, cascade='all, delete-orphan')
@@ -97,10 +270,13 @@ class Form(db.Model):
     is_quiz = db.Column(db.Boolean, default=False)  # Is this form a quiz?
     passing_score = db.Column(db.Integer, default=0)  # Passing score percentage
     show_score = db.Column(db.Boolean, default=True)  # Whether to show score to respondents
+    
+    # Bumped whenever questions or settings change so cached form schemas can be rebuilt
+    schema_version = db.Column(db.Integer, default=1, nullable=False, server_default='1')
 
 class SubQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False, index=True)
     parent_option = db.Column(db.String(255), nullable=False)  # Which option this subquestion belongs to
     question_text = db.Column(db.String(500), nullable=False)
     question_type = db.Column(db.String(20), nullable=False)  # text, multiple_choice, checkbox
@@ -113,16 +289,24 @@ class SubQuestion(db.Model):
 # Add this model for tracking postbacks
 class PostbackTracking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False, index=True)
     tracking_id = db.Column(db.String(100), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     transaction_count = db.Column(db.Integer, default=0)
+    total_payout = db.Column(db.Float, default=0)
     
     form = db.relationship('Form', backref='postback_tracking')
 
 # Add this model for storing postback logs
 class PostbackLog(db.Model):
+    __table_args__ = (
+        # Latest logs per tracking ID for the postback dashboard
+        db.Index('ix_postback_log_tracking_id_timestamp', 'tracking_id', 'timestamp'),
+        # Ad networks retry postbacks, each transaction is stored once
+        db.Index('uq_postback_log_tracking_id_transaction_id', 'tracking_id', 'transaction_id', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     tracking_id = db.Column(db.String(100), nullable=False)
     transaction_id = db.Column(db.String(100), nullable=True)
@@ -131,29 +315,52 @@ class PostbackLog(db.Model):
     status = db.Column(db.String(50), nullable=True)
     payout = db.Column(db.Float, nullable=True)
     response_json = db.Column(db.Text, nullable=True)  # Store full response
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     ip_address = db.Column(db.String(50), nullable=True)
 
     def get_options(self):
         if self.options:
             try:
-                return json.loads(self.options)
+                return json_loads(self.options)
             except:
                 return []
         return []
     
     def set_options(self, options):
-        self.options = json.dumps(options)
+        self.options = json_dumps(options)
+
+# Postback totals per tracking ID and period, maintained as logs are stored
+class PostbackRollup(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('tracking_id', 'granularity', 'period_start', 'status',
+                            name='uq_postback_rollup_tracking_id_granularity_period_start_status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tracking_id = db.Column(db.String(100), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # hour or day
+    period_start = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(50), nullable=False, default='')  # '' for postbacks without a status
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    total_payout = db.Column(db.Float, nullable=False, default=0)
 
 class SubQuestionAnswer(db.Model):
+    __table_args__ = (
+        db.Index('ix_sub_question_answer_response_id_subquestion_id', 'response_id', 'subquestion_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     response_id = db.Column(db.Integer, db.ForeignKey('response.id'), nullable=False)
-    subquestion_id = db.Column(db.Integer, db.ForeignKey('sub_question.id'), nullable=False)
+    subquestion_id = db.Column(db.Integer, db.ForeignKey('sub_question.id'), nullable=False, index=True)
     selected_option = db.Column(db.String(255), nullable=True)  # For multiple choice/checkbox
     answer_text = db.Column(db.Text, nullable=True)  # For text questions
 
 # Modify the Question model to include relationship to SubQuestions
 class Question(db.Model):
+    __table_args__ = (
+        db.Index('ix_question_form_id_order', 'form_id', 'order'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
     question_text = db.Column(db.String(500), nullable=False)
@@ -173,20 +380,23 @@ class Question(db.Model):
                                cascade='all, delete-orphan')
 
     def get_options(self):
-        import json
         if self.options:
             try:
-                return json.loads(self.options)
+                return json_loads(self.options)
             except:
                 return []
         return []
 
     def set_options(self, options):
-        import json
-        self.options = json.dumps(options)
+        self.options = json_dumps(options)
 
 # Update the Response model to include subquestion answers
 class Response(db.Model):
+    __table_args__ = (
+        # Filtering by form and keyset pagination on ID
+        db.Index('ix_response_form_id_id', 'form_id', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -210,23 +420,65 @@ class Response(db.Model):
     score = db.Column(db.Integer, nullable=True)  # Quiz score (total points)
     max_score = db.Column(db.Integer, nullable=True)  # Maximum possible score
     passed = db.Column(db.Boolean, nullable=True)  # Whether the user passed
+    
+    # Set once the response has been written to its exports/survey_responses bucket by the export worker
+    exported_at = db.Column(db.DateTime, nullable=True, index=True)
+
+# Running response analytics of a form, see get_response_analytics()
+class ResponseSummary(db.Model):
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), primary_key=True, autoincrement=False)
+    last_response_id = db.Column(db.Integer, nullable=False, default=0)  # Newest response included
+    response_count = db.Column(db.Integer, nullable=False, default=0)
+    state = db.Column(db.Text, nullable=False)  # JSON counts per breakdown and question
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Answer(db.Model):
+    __table_args__ = (
+        db.Index('ix_answer_response_id_question_id', 'response_id', 'question_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     response_id = db.Column(db.Integer, db.ForeignKey('response.id'), nullable=False)
-    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False, index=True)
     answer_text = db.Column(db.Text, nullable=False)
 
 class PDFUpload(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 of the file, also its name in uploads/
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=True)
     user = db.relationship('User', backref='pdf_uploads')
     form = db.relationship('Form', backref='pdf_upload')
 
+class ParsedDocument(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'content_hash', 'parser_version', name='uq_parsed_document_kind_hash_version'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # pdf or mindmap
+    content_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the parsed input
+    parser_version = db.Column(db.String(64), nullable=False)  # Parser and budgets that produced the result
+    result = db.Column(db.Text, nullable=False)  # JSON parser output
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PDFExtractionJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    pdf_upload_id = db.Column(db.Integer, db.ForeignKey('pdf_upload.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True)  # Referral company for the generated form
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, done, failed
+    pages_total = db.Column(db.Integer, nullable=True)
+    pages_done = db.Column(db.Integer, nullable=False, default=0)
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=True)  # Set once the form has been generated
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # Heartbeat while the job is running
+    finished_at = db.Column(db.DateTime, nullable=True)
+
 class FormTemplate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -272,6 +524,322 @@ class FormTemplate(db.Model):
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+# Compiled form schemas
+#
+# The public form routes (view, embed, submit) only need a read-only view of a form's
+# settings, questions and subquestions. Instead of reloading and re-parsing them on every
+# request, they are compiled once per form version into immutable objects and kept in
+# an in-process LRU cache.
+
+class FrozenSchema:
+    """Base class for immutable, slot-based schema objects"""
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+class SubQuestionSchema(FrozenSchema):
+    __slots__ = ('id', 'question_id', 'parent_option', 'question_text', 'question_type',
+                 'options', 'parsed_options', 'required', 'order', 'nesting_level')
+
+    def get_options(self):
+        return self.parsed_options
+
+class QuestionSchema(FrozenSchema):
+    __slots__ = ('id', 'form_id', 'question_text', 'question_type', 'options', 'parsed_options',
+                 'nested_options', 'required', 'order', 'is_quiz_question', 'correct_answer',
+                 'points', 'feedback', 'subquestions')
+
+    def get_options(self):
+        return self.parsed_options
+
+class FormSchema(FrozenSchema):
+    __slots__ = ('id', 'version', 'title', 'description', 'user_id', 'company_id', 'is_closed',
+                 'requires_consent', 'is_quiz', 'passing_score', 'show_score', 'questions',
+                 'subquestions', 'subquestion_index', 'quiz_answer_keys')
+
+class QuizAnswerKey(FrozenSchema):
+    """
+    Precomputed answer key for one quiz question
+    
+    Option indexes are already resolved to option texts, and checkbox answers are
+    compared as sets, so grading never has to parse JSON.
+    """
+    __slots__ = ('question_id', 'points', 'correct_text', 'correct_set')
+
+    def is_correct(self, answer_text):
+        if self.correct_set is not None:
+            return frozenset(answer_text.split(', ')) == self.correct_set
+        return self.correct_text is not None and answer_text == self.correct_text
+
+def option_text_at(parsed_options, index):
+    """Return the text of the option at `index`, or None if there is no such option"""
+    try:
+        option = parsed_options[int(index)]
+    except (ValueError, TypeError, IndexError):
+        return None
+    return option.get('text') if isinstance(option, dict) else option
+
+def compile_quiz_answer_key(question, parsed_options):
+    """
+    Build the QuizAnswerKey for a quiz question
+    
+    Radio and multiple choice questions store the index of the correct option.
+    Checkbox questions may store a list of option indexes or texts (or a
+    ', '-joined string). Every other type is compared with the stored text.
+    """
+    correct = None
+    if question.correct_answer:
+        try:
+            correct = json.loads(question.correct_answer)
+        except (json.JSONDecodeError, TypeError):
+            correct = None
+    
+    correct_text = None
+    correct_set = None
+    if correct is not None:
+        if question.question_type in ['radio', 'multiple_choice']:
+            correct_text = option_text_at(parsed_options, correct)
+        elif question.question_type == 'checkbox':
+            values = correct if isinstance(correct, list) else str(correct).split(', ')
+            correct_set = frozenset(
+                option_text_at(parsed_options, value) if isinstance(value, int) else str(value)
+                for value in values
+            )
+        else:
+            correct_text = correct if isinstance(correct, str) else json.dumps(correct)
+    
+    return QuizAnswerKey(
+        question_id=question.id,
+        points=int(question.points or 0),
+        correct_text=correct_text,
+        correct_set=correct_set
+    )
+
+def parse_options_json(options):
+    """Parse a JSON options column, returning an empty list for missing or invalid data"""
+    if not options:
+        return []
+    try:
+        parsed = json_loads(options)
+    except (ValueError, TypeError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+def build_nested_options(parsed_options):
+    """Convert parsed options to the nested {"text": ..., "subquestions": [...]} format"""
+    if parsed_options and isinstance(parsed_options[0], str):
+        return tuple({"text": opt, "subquestions": []} for opt in parsed_options if opt)
+    return tuple(parsed_options)
+
+def compile_form_schema(form):
+    """
+    Compile a Form and its questions into an immutable FormSchema
+    
+    Args:
+        form: The Form object to compile
+        
+    Returns:
+        FormSchema: Read-only snapshot of the form, safe to share between requests
+    """
+    subquestion_index = {}
+    all_subquestions = []
+    for question_id, options in load_subquestion_index(form.id).items():
+        compiled_options = {}
+        for parent_option, subquestions in options.items():
+            compiled = tuple(
+                SubQuestionSchema(
+                    id=subq.id,
+                    question_id=subq.question_id,
+                    parent_option=subq.parent_option,
+                    question_text=subq.question_text,
+                    question_type=subq.question_type,
+                    options=subq.options,
+                    parsed_options=tuple(parse_options_json(subq.options)),
+                    required=subq.required,
+                    order=subq.order,
+                    nesting_level=subq.nesting_level
+                )
+                for subq in subquestions
+            )
+            compiled_options[parent_option] = compiled
+            all_subquestions.extend(compiled)
+        subquestion_index[question_id] = compiled_options
+    
+    questions = []
+    quiz_answer_keys = []
+    for question in sorted(form.questions, key=lambda q: (q.order, q.id)):
+        parsed_options = tuple(parse_options_json(question.options))
+        
+        if question.is_quiz_question:
+            quiz_answer_keys.append(compile_quiz_answer_key(question, parsed_options))
+        
+        questions.append(QuestionSchema(
+            id=question.id,
+            form_id=question.form_id,
+            question_text=question.question_text,
+            question_type=question.question_type,
+            options=question.options,
+            parsed_options=parsed_options,
+            nested_options=build_nested_options(parsed_options) if question.question_type in ['radio', 'multiple_choice'] else (),
+            required=question.required,
+            order=question.order,
+            is_quiz_question=question.is_quiz_question,
+            correct_answer=question.correct_answer,
+            points=question.points or 0,
+            feedback=question.feedback,
+            subquestions=tuple(sq for group in subquestion_index.get(question.id, {}).values() for sq in group)
+        ))
+    
+    return FormSchema(
+        id=form.id,
+        version=form.schema_version,
+        title=form.title,
+        description=form.description,
+        user_id=form.user_id,
+        company_id=form.company_id,
+        is_closed=form.is_closed,
+        requires_consent=form.requires_consent,
+        is_quiz=form.is_quiz,
+        passing_score=form.passing_score or 0,
+        show_score=form.show_score,
+        questions=tuple(questions),
+        subquestions=tuple(all_subquestions),
+        subquestion_index=subquestion_index,
+        quiz_answer_keys=tuple(quiz_answer_keys)
+    )
+
+def score_quiz(form, answers):
+    """
+    Grade a submission against the form's precompiled quiz answer keys
+    
+    Only answered quiz questions count towards the maximum score.
+    
+    Args:
+        form: The FormSchema of the quiz
+        answers: dict of {question_id: answer_text} for the answered questions
+        
+    Returns:
+        tuple: (score, max_score, passed)
+    """
+    score = 0
+    max_score = 0
+    for key in form.quiz_answer_keys:
+        answer_text = answers.get(key.question_id)
+        if not answer_text:
+            continue
+        max_score += key.points
+        if key.is_correct(answer_text):
+            score += key.points
+    
+    # Check if the respondent passed the quiz based on passing percentage
+    passed = max_score > 0 and (score / max_score) * 100 >= form.passing_score
+    return score, max_score, passed
+
+def rescore_quiz_responses(form_id, batch_size=1000):
+    """
+    Re-grade every stored response of a quiz against its current answer keys
+    
+    Responses are processed in ID order, one batch at a time: a single query loads
+    the batch's answers to quiz questions and one bulk UPDATE writes the scores.
+    
+    Returns:
+        int: Number of responses rescored
+    """
+    form = get_form_schema(form_id)
+    if not form.is_quiz:
+        return 0
+    
+    quiz_question_ids = [key.question_id for key in form.quiz_answer_keys]
+    rescored = 0
+    last_id = 0
+    while True:
+        response_ids = [row.id for row in db.session.query(Response.id).filter(
+            Response.form_id == form_id,
+            Response.id > last_id
+        ).order_by(Response.id).limit(batch_size)]
+        if not response_ids:
+            break
+        last_id = response_ids[-1]
+        
+        answers = {}
+        if quiz_question_ids:
+            rows = db.session.query(Answer.response_id, Answer.question_id, Answer.answer_text).filter(
+                Answer.response_id.in_(response_ids),
+                Answer.question_id.in_(quiz_question_ids)
+            ).order_by(Answer.id)
+            for response_id, question_id, answer_text in rows:
+                answers.setdefault(response_id, {}).setdefault(question_id, answer_text)
+        
+        scores = []
+        for response_id in response_ids:
+            score, max_score, passed = score_quiz(form, answers.get(response_id, {}))
+            scores.append({'id': response_id, 'score': score, 'max_score': max_score, 'passed': passed})
+        db.session.execute(update(Response), scores)
+        rescored += len(response_ids)
+    
+    db.session.commit()
+    return rescored
+
+class FormSchemaCache:
+    """Thread-safe LRU cache of compiled form schemas keyed by form ID"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._schemas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, form_id, version):
+        with self._lock:
+            schema = self._schemas.get(form_id)
+            if schema is None or schema.version != version:
+                return None
+            self._schemas.move_to_end(form_id)
+            return schema
+
+    def put(self, schema):
+        with self._lock:
+            self._schemas[schema.id] = schema
+            self._schemas.move_to_end(schema.id)
+            while len(self._schemas) > self.maxsize:
+                self._schemas.popitem(last=False)
+
+    def invalidate(self, form_id):
+        with self._lock:
+            self._schemas.pop(form_id, None)
+
+form_schema_cache = FormSchemaCache(app.config['FORM_SCHEMA_CACHE_SIZE'])
+
+def get_form_schema(form_id):
+    """
+    Return the compiled schema for a form, rebuilding it if the form has changed
+    
+    Only the form's schema_version is read from the database on a cache hit, so
+    other workers' edits are picked up without a full reload. Aborts with 404 if
+    the form does not exist.
+    """
+    row = db.session.query(Form.schema_version).filter(Form.id == form_id).first()
+    if row is None:
+        abort(404)
+    
+    schema = form_schema_cache.get(form_id, row.schema_version)
+    if schema is None:
+        schema = compile_form_schema(Form.query.get_or_404(form_id))
+        form_schema_cache.put(schema)
+    return schema
+
+def invalidate_form_schema(form):
+    """Mark a form as changed so every worker recompiles its schema on next use"""
+    form.schema_version = (form.schema_version or 0) + 1
+    form_schema_cache.invalidate(form.id)
+
 # Routes
 
 def generate_postback_url(form_id, user_id):
@@ -302,151 +870,823 @@ def generate_postback_url(form_id, user_id):
     
     return f"{base_url}?{urlencode(params)}"
 
-# Add this function to save postback data to JSON file
-def save_postback_to_json(postback_data):
-    filename = 'postback_logs.json'
-    
-    # Try to read existing data
-    try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-        
-    # Add timestamp to data
-    postback_data['logged_at'] = datetime.utcnow().isoformat()
-    
-    # Append new data
-    data.append(postback_data)
-    
-    # Write back to file
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+class PostbackLogWriter:
+    """
+    Append-only, line-delimited postback log with a single writer thread
     
-    return True
+    Callers only put records on a queue; the writer thread drains it in batches
+    and appends one JSON object per line, so each postback costs O(1) no matter
+    how large the log is. The active file is rotated by size or age into
+    timestamped segments, which are optionally gzip-compressed in the background.
+    """
 
-# Add this function after existing imports
-def extract_utm_parameters(request):
-    """Extract all UTM parameters from a request"""
-    utm_params = {}
-    
-    # Common UTM parameters to extract
-    utm_fields = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content']
-    
-    for param in utm_fields:
-        value = request.args.get(param)
-        if value:
-            utm_params[param] = value
-    
-    return utm_params
-def detect_device_type(user_agent):
-    """Detect if user is on mobile, tablet, or desktop based on user agent string"""
-    user_agent = user_agent.lower()
-    
-    # Check for mobile devices first
-    if any(word in user_agent for word in ['iphone', 'android', 'mobile', 'phone']):
-        # Special check for tablets that also have "android" in their UA
-        if any(word in user_agent for word in ['ipad', 'tablet']):
-            return 'tablet'
-        return 'mobile'
-    
-    # Check for tablets
-    elif any(word in user_agent for word in ['ipad', 'tablet']):
-        return 'tablet'
-    
-    # Default to desktop
-    else:
-        return 'desktop'
-    
-@app.route('/')
-def index():
-    # Extract UTM parameters and session ID
-    utm_params = extract_utm_parameters(request)
-    session_id = request.args.get('session_id')
-    
-    # Detect device type
-    device_type = request.args.get('device')
-    if not device_type:
-        device_type = detect_device_type(request.user_agent.string)
-    
-    # Store UTM, session and device data in session if present
-    if 'utm_source' in utm_params:
-        session['utm_source'] = utm_params['utm_source']
-        session['utm_data'] = utm_params
-    
-    if session_id:
-        session['session_id'] = session_id
-        
-    # Store device type
-    session['device_type'] = device_type
-    
-    # Check if there are form_id and user_id query parameters
-    form_id = request.args.get('form_id')
-    user_id = request.args.get('user_id')
-    
-    # If both parameters exist, try to show the form
-    if form_id and user_id:
-        try:
-            form_id = int(form_id)
-            user_id = int(user_id)
-            
-            # Check if the form exists and belongs to the specified user
-            form = Form.query.filter_by(id=form_id, user_id=user_id).first()
+    def __init__(self, path, max_bytes, rotate_seconds, compress):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress = compress
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._opened_at = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='postback-log-writer', daemon=True)
+                self._thread.start()
+
+    def write(self, record):
+        self.start()
+        self._queue.put(record)
+
+    def close(self, timeout=5):
+        """Flush queued records and stop the writer thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            records = [self._queue.get()]
+            # Drain whatever else arrived so a burst becomes a single write
+            while len(records) < 1000:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
             
-            if form:
-                # If found, redirect to the form view - ensure we don't lose UTM parameters
-                return redirect(url_for('view_form', form_id=form_id))
-            else:
-                flash('Form not found or invalid user ID')
-        except ValueError:
-            flash('Invalid form ID or user ID')
-    
-    # If no parameters or invalid form, show the regular index page
-    return render_template('index.html')
+            stop = None in records
+            lines = ''.join(json_dumps(record) + '\n' for record in records if record is not None)
+            try:
+                if lines:
+                    self._append(lines)
+            except Exception as e:
+                print(f"Error writing postback log: {str(e)}")
+            if stop:
+                if self._file:
+                    self._file.close()
+                    self._file = None
+                return
 
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    if request.method == 'POST':
-        email = request.form.get('email')
-        password = request.form.get('password')
-        user = User.query.filter_by(email=email).first()
+    def _append(self, lines):
+        self._ensure_open()
+        self._file.write(lines)
+        self._file.flush()
         
-        if user and user.check_password(password):
-            login_user(user)
-            return redirect(url_for('dashboard'))
-        flash('Invalid email or password')
-    return render_template('login.html')
+        too_big = self._file.tell() >= self.max_bytes
+        too_old = time.time() - self._opened_at >= self.rotate_seconds
+        if too_big or too_old:
+            self._rotate()
 
-@app.route('/signup', methods=['GET', 'POST'])
-def signup():
-    if request.method == 'POST':
-        email = request.form.get('email')
-        password = request.form.get('password')
-        
-        if User.query.filter_by(email=email).first():
-            flash('Email already registered')
-            return redirect(url_for('signup'))
-            
-        user = User(email=email)
-        user.set_password(password)
-        db.session.add(user)
-        db.session.commit()
+    def _ensure_open(self):
+        # Reopen if another process rotated the file away from under us
+        if self._file is not None:
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._file.fileno()).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            self._file.close()
         
-        login_user(user)
-        return redirect(url_for('dashboard'))
-    return render_template('signup.html')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a')
+        # The mtime moves with every write, so the time the file was started is kept
+        # in a sidecar; whoever opens it empty restarts the clock, later openers
+        # (other workers, or this one after a restart) read it back
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._opened_at = self._write_opened_at()
+        else:
+            self._opened_at = self._read_opened_at()
 
-@app.route('/dashboard')
-@login_required
-def dashboard():
-    try:
-        # Get user's forms
-        forms = Form.query.filter_by(user_id=current_user.id).all()
+    def _read_opened_at(self):
+        try:
+            with open(self.path + '.opened') as f:
+                return float(f.read())
+        except (OSError, ValueError):
+            # A log written before the sidecar existed ages from now
+            return self._write_opened_at()
+
+    def _write_opened_at(self):
+        opened_at = time.time()
+        tmp_path = f'{self.path}.opened.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(repr(opened_at))
+            os.replace(tmp_path, self.path + '.opened')
+        except OSError as e:
+            print(f"Error recording postback log open time: {str(e)}")
+        return opened_at
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
         
-        # Get predefined templates
-        predefined_templates = FormTemplate.query.filter_by(is_public=True).all()
+        base, ext = os.path.splitext(self.path)
+        segment = f"{base}.{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}{ext}"
+        try:
+            os.rename(self.path, segment)
+        except FileNotFoundError:
+            # Another process rotated it first
+            return
         
-        # Get user's custom templates if they exist
+        if self.compress:
+            threading.Thread(target=self._compress_segment, args=(segment,), daemon=True).start()
+
+    @staticmethod
+    def _compress_segment(segment):
+        try:
+            with open(segment, 'rb') as src, gzip.open(segment + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(segment)
+        except Exception as e:
+            print(f"Error compressing postback log segment {segment}: {str(e)}")
+
+postback_log_writer = PostbackLogWriter(
+    app.config['POSTBACK_LOG_FILE'],
+    app.config['POSTBACK_LOG_MAX_BYTES'],
+    app.config['POSTBACK_LOG_ROTATE_SECONDS'],
+    app.config['POSTBACK_LOG_COMPRESS']
+)
+atexit.register(postback_log_writer.close)
+
+# Add this function to save postback data to the append-only postback log
+def save_postback_to_json(postback_data):
+    # Add timestamp to data
+    postback_data['logged_at'] = datetime.utcnow()
+    
+    # Queue for the single writer thread; the request never touches the file
+    postback_log_writer.write(postback_data)
+    
+    return True
+
+class TrackingCache:
+    """
+    Thread-safe LRU cache of tracking_id -> form_id for known postback tracking IDs
+
+    Entries expire after `ttl` seconds, so trackings deleted by another process
+    stop being accepted here within that time. store_postbacks() checks the
+    trackings again before storing, so nothing is stored for them in between.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._forms = OrderedDict()  # tracking_id -> (form_id, expires)
+        self._lock = threading.Lock()
+
+    def get_form_id(self, tracking_id):
+        """Return the form ID of a tracking ID, or None if it doesn't exist"""
+        with self._lock:
+            entry = self._forms.get(tracking_id)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._forms.move_to_end(tracking_id)
+                    return entry[0]
+                del self._forms[tracking_id]
+
+        form_id = db.session.query(PostbackTracking.form_id).filter_by(tracking_id=tracking_id).scalar()
+        if form_id is None:
+            return None
+
+        with self._lock:
+            self._forms[tracking_id] = (form_id, time.monotonic() + self.ttl)
+            while len(self._forms) > self.maxsize:
+                self._forms.popitem(last=False)
+        return form_id
+
+    def invalidate_form(self, form_id):
+        with self._lock:
+            for tracking_id in [t for t, (f, _) in self._forms.items() if f == form_id]:
+                del self._forms[tracking_id]
+
+tracking_cache = TrackingCache(app.config['POSTBACK_TRACKING_CACHE_SIZE'], app.config['POSTBACK_TRACKING_CACHE_TTL'])
+
+def insert_new_postback_logs(rows):
+    """
+    Insert postback log rows, skipping transactions that are already stored
+
+    Uses a single INSERT ... ON CONFLICT DO NOTHING RETURNING on SQLite and Postgres
+    and falls back to one INSERT per row in a savepoint otherwise.
+
+    Returns:
+        list: (tracking_id, payout, status, timestamp) of the rows actually inserted
+    """
+    if not rows:
+        return []
+    table = PostbackLog.__table__
+    dialect = db.engine.dialect
+    dialect_insert = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}.get(dialect.name)
+    if dialect_insert is not None and dialect.insert_executemany_returning:
+        statement = dialect_insert(table).on_conflict_do_nothing(
+            index_elements=['tracking_id', 'transaction_id']
+        ).returning(table.c.tracking_id, table.c.payout, table.c.status, table.c.timestamp)
+        return [tuple(row) for row in db.session.execute(statement, rows)]
+
+    inserted = []
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table).values(**row))
+            inserted.append((row['tracking_id'], row['payout'], row['status'], row['timestamp']))
+        except IntegrityError:
+            pass
+    return inserted
+
+def store_postbacks(records):
+    """
+    Insert postback log rows and bump their trackings' totals and rollups, the caller commits
+
+    Retried transactions hit the (tracking_id, transaction_id) unique index and are
+    skipped. The new logs go out as one statement and each tracking ID gets a single
+    atomic UPDATE ... SET transaction_count = transaction_count + n, so concurrent
+    writers never lose increments. The hourly and daily rollups are bumped in the
+    same transaction.
+
+    Returns:
+        int: Number of postbacks stored, duplicates excluded
+    """
+    # Trackings may have been deleted since the postbacks were accepted, possibly by another process
+    known = {row.tracking_id for row in db.session.query(PostbackTracking.tracking_id).filter(
+        PostbackTracking.tracking_id.in_({record['tracking_id'] for record in records})
+    )}
+    dropped = sum(1 for record in records if record['tracking_id'] not in known)
+    if dropped:
+        print(f"Dropped {dropped} postbacks for deleted trackings")
+
+    # NULL transaction IDs don't collide in the unique index, empty strings would
+    inserted = insert_new_postback_logs([
+        dict(record, timestamp=datetime.fromisoformat(record['timestamp']),
+             transaction_id=record.get('transaction_id') or None)
+        for record in records if record['tracking_id'] in known
+    ])
+
+    totals = {}
+    for tracking_id, payout, _, _ in inserted:
+        count, total_payout = totals.get(tracking_id, (0, 0))
+        totals[tracking_id] = (count + 1, total_payout + (payout or 0))
+    upsert_postback_rollups(rollup_increments(inserted))
+
+    now = datetime.utcnow()
+    for tracking_id, (count, total_payout) in totals.items():
+        db.session.execute(
+            update(PostbackTracking)
+            .where(PostbackTracking.tracking_id == tracking_id)
+            .values(transaction_count=func.coalesce(PostbackTracking.transaction_count, 0) + count,
+                    total_payout=func.coalesce(PostbackTracking.total_payout, 0) + total_payout,
+                    last_updated=now)
+        )
+    return len(inserted)
+
+POSTBACK_ROLLUP_GRANULARITIES = ('hour', 'day')
+
+def rollup_period_start(timestamp, granularity):
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def rollup_increments(logs):
+    """
+    Sum postback logs into rollup increments
+
+    Args:
+        logs: iterable of (tracking_id, payout, status, timestamp)
+
+    Returns:
+        dict: {(tracking_id, granularity, period_start, status): (count, payout)}
+    """
+    increments = {}
+    for tracking_id, payout, status, timestamp in logs:
+        for granularity in POSTBACK_ROLLUP_GRANULARITIES:
+            key = (tracking_id, granularity, rollup_period_start(timestamp, granularity), status or '')
+            count, total_payout = increments.get(key, (0, 0))
+            increments[key] = (count + 1, total_payout + (payout or 0))
+    return increments
+
+def upsert_postback_rollups(increments):
+    """
+    Add increments to the rollup rows, creating missing rows, the caller commits
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on SQLite and Postgres, so concurrent
+    writers add to the same row atomically, and UPDATE then INSERT otherwise.
+    """
+    if not increments:
+        return
+    table = PostbackRollup.__table__
+    rows = [
+        {
+            'tracking_id': tracking_id,
+            'granularity': granularity,
+            'period_start': period_start,
+            'status': status,
+            'transaction_count': count,
+            'total_payout': total_payout
+        }
+        for (tracking_id, granularity, period_start, status), (count, total_payout) in increments.items()
+    ]
+
+    dialect_insert = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}.get(db.engine.dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=['tracking_id', 'granularity', 'period_start', 'status'],
+            set_={
+                'transaction_count': table.c.transaction_count + statement.excluded.transaction_count,
+                'total_payout': table.c.total_payout + statement.excluded.total_payout
+            }
+        )
+        db.session.execute(statement, rows)
+        return
+
+    for row in rows:
+        updated = db.session.execute(
+            update(table).where(
+                table.c.tracking_id == row['tracking_id'],
+                table.c.granularity == row['granularity'],
+                table.c.period_start == row['period_start'],
+                table.c.status == row['status']
+            ).values(
+                transaction_count=table.c.transaction_count + row['transaction_count'],
+                total_payout=table.c.total_payout + row['total_payout']
+            )
+        ).rowcount
+        if not updated:
+            db.session.execute(insert(table).values(**row))
+
+def backfill_postback_rollups(batch_size=50000):
+    """
+    Rebuild the rollups from the stored postback logs
+
+    The rollups are cleared and the logs up to the newest one at the start are
+    summed in id order, one batch per transaction, while postbacks stored in the
+    meantime keep adding to the rollups as usual. Totals are low until it finishes.
+
+    Returns:
+        int: Number of logs rolled up
+    """
+    if db.engine.dialect.name == 'postgresql':
+        # Wait for in-flight postback transactions and hold new ones off until the commit
+        db.session.execute(text('LOCK TABLE postback_log IN SHARE MODE'))
+    PostbackRollup.query.delete(synchronize_session=False)
+    # Read in the transaction that clears the rollups (SQLite holds the write lock from
+    # the delete on), so every later log has its own increment in the new rollups
+    last_id = db.session.query(func.max(PostbackLog.id)).scalar() or 0
+    db.session.commit()
+
+    after = 0
+    rolled_up = 0
+    while after < last_id:
+        logs = db.session.query(
+            PostbackLog.id, PostbackLog.tracking_id, PostbackLog.payout, PostbackLog.status, PostbackLog.timestamp
+        ).filter(
+            PostbackLog.id > after,
+            PostbackLog.id <= last_id
+        ).order_by(PostbackLog.id).limit(batch_size).all()
+        if not logs:
+            break
+        upsert_postback_rollups(rollup_increments(
+            (log.tracking_id, log.payout, log.status, log.timestamp or datetime.utcnow()) for log in logs
+        ))
+        db.session.commit()
+        after = logs[-1].id
+        rolled_up += len(logs)
+    return rolled_up
+
+class PostbackDedupFilter:
+    """
+    In-memory front for postback deduplication
+
+    Remembers the (tracking_id, transaction_id) of postbacks accepted by this
+    process: the most recent ones in an LRU and all of them in a Bloom filter.
+    A key missing from the Bloom filter is new to this process and is accepted
+    without a query. A key in the LRU is a retry and is rejected without touching
+    the database. Anything else (evicted from the LRU or a Bloom false positive)
+    is checked against the unique index. Other processes' postbacks are not seen
+    here; the unique index still stores them once.
+    """
+
+    def __init__(self, lru_size, bloom_bits, bloom_hashes):
+        self.lru_size = lru_size
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self._recent = OrderedDict()
+        self._bloom = bytearray((bloom_bits + 7) // 8)
+        self._bloom_count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bloom_bits for i in range(self.bloom_hashes)]
+
+    def _bloom_contains(self, positions):
+        return all(self._bloom[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def _remember(self, key, positions):
+        self._recent[key] = True
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.lru_size:
+            self._recent.popitem(last=False)
+
+        # Start over once the filter holds more keys than it was sized for (~1% false positives)
+        if self._bloom_count >= self.bloom_bits // 10:
+            self._bloom = bytearray(len(self._bloom))
+            self._bloom_count = 0
+        for p in positions:
+            self._bloom[p >> 3] |= 1 << (p & 7)
+        self._bloom_count += 1
+
+    def is_duplicate(self, tracking_id, transaction_id):
+        """Return True for a transaction already received, otherwise remember it and return False"""
+        key = f'{tracking_id}\x00{transaction_id}'
+        positions = self._positions(key)
+        with self._lock:
+            if key in self._recent:
+                self._recent.move_to_end(key)
+                return True
+            maybe_seen = self._bloom_contains(positions)
+
+        if maybe_seen:
+            stored = db.session.query(PostbackLog.id).filter_by(
+                tracking_id=tracking_id, transaction_id=transaction_id
+            ).first() is not None
+            if stored:
+                with self._lock:
+                    self._remember(key, positions)
+                return True
+
+        with self._lock:
+            # Another request thread may have taken it in the meantime
+            if key in self._recent:
+                return True
+            self._remember(key, positions)
+        return False
+
+    def forget(self, tracking_id, transaction_id):
+        """Drop a transaction remembered by is_duplicate() whose postback could not be stored"""
+        # The Bloom filter keeps it, which only costs a database check on the retry
+        with self._lock:
+            self._recent.pop(f'{tracking_id}\x00{transaction_id}', None)
+
+postback_dedup_filter = PostbackDedupFilter(
+    app.config['POSTBACK_DEDUP_CACHE_SIZE'],
+    app.config['POSTBACK_DEDUP_BLOOM_BITS'],
+    app.config['POSTBACK_DEDUP_BLOOM_HASHES']
+)
+
+def recompute_postback_totals():
+    """
+    Rebuild every tracking's transaction_count and total_payout from the stored logs
+
+    Returns:
+        int: Number of trackings updated
+    """
+    counts = select(func.count(PostbackLog.id)).where(
+        PostbackLog.tracking_id == PostbackTracking.tracking_id
+    ).scalar_subquery()
+    payouts = select(func.coalesce(func.sum(PostbackLog.payout), 0)).where(
+        PostbackLog.tracking_id == PostbackTracking.tracking_id
+    ).scalar_subquery()
+    result = db.session.execute(
+        update(PostbackTracking).values(transaction_count=counts, total_payout=payouts),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return result.rowcount
+
+def is_transient_db_error(error):
+    """Return True for database errors worth retrying: a locked or busy database or a lost connection"""
+    if not isinstance(error, OperationalError):
+        return False
+    message = str(error.orig).lower()
+    return error.connection_invalidated or 'database is locked' in message or 'database is busy' in message
+
+class PostbackIngestor:
+    """
+    Durable, batched postback ingestion
+
+    receive_postback() appends each accepted postback to this process's spool file
+    and queues it, so the request is acknowledged without touching the database.
+    A writer thread gathers postbacks for up to `window` seconds, stores the batch
+    with store_postbacks() in one transaction and then records how far the spool
+    has been stored in a checkpoint file next to it.
+
+    The spool is locked by its process while it runs. When a worker starts it
+    replays the unstored tail of every spool whose process is gone, so a crash
+    between acknowledging and committing loses nothing. Delivery is at least once:
+    a crash between the commit and the checkpoint replays that batch.
+    """
+
+    def __init__(self, folder, window, max_batch, fsync, max_bytes):
+        self.folder = folder
+        self.window = window
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._spool = None
+        self._spool_path = None
+
+    def start(self):
+        """Start the writer thread if it is not running yet"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='postback-ingestor', daemon=True)
+                self._thread.start()
+
+    def ingest(self, record):
+        """Append a postback to the spool and queue it for storing"""
+        line = json_dumps_bytes(record) + b'\n'
+        with self._lock:
+            spool = self._open_spool()
+            spool.write(line)
+            spool.flush()
+            if self.fsync:
+                os.fsync(spool.fileno())
+            offset = spool.tell()
+        self.start()
+        self._queue.put((record, offset))
+
+    def close(self, timeout=5):
+        """Store queued postbacks and stop the writer thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _open_spool(self):
+        if self._spool is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self._spool_path = os.path.join(self.folder, f'spool-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl')
+            self._spool = open(self._spool_path, 'ab')
+            if fcntl is not None:
+                fcntl.flock(self._spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return self._spool
+
+    @staticmethod
+    def _write_checkpoint(spool_path, offset):
+        tmp_path = f'{spool_path}.ckpt.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(offset))
+        os.replace(tmp_path, f'{spool_path}.ckpt')
+
+    @staticmethod
+    def _read_checkpoint(spool_path):
+        try:
+            with open(f'{spool_path}.ckpt') as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _collect_batch(self):
+        """Block for the first postback, then gather any that arrive within `window` seconds"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while batch[-1] is not None and len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        with app.app_context():
+            try:
+                self.recover()
+            except Exception as e:
+                print(f"Error recovering postback spools: {str(e)}")
+            finally:
+                db.session.remove()
+
+        while True:
+            batch = self._collect_batch()
+            stop = batch[-1] is None
+            items = [item for item in batch if item is not None]
+            if items:
+                with app.app_context():
+                    try:
+                        self.commit_batch([record for record, _ in items])
+                    finally:
+                        db.session.remove()
+                self._checkpoint(items[-1][1])
+            if stop:
+                return
+
+    def _checkpoint(self, offset):
+        self._write_checkpoint(self._spool_path, offset)
+        # Once everything in the spool is stored it can start over
+        if offset >= self.max_bytes:
+            with self._lock:
+                if self._spool.tell() == offset:
+                    self._spool.truncate(0)
+                    self._spool.seek(0)
+                    self._write_checkpoint(self._spool_path, 0)
+
+    def commit_batch(self, records):
+        """
+        Store a batch, retrying while the database is locked, busy or unreachable
+
+        A batch that fails for any other reason (including permanent operational
+        errors such as a missing table) is stored one postback at a time, and a
+        postback that can't be stored is set aside in rejected.jsonl.
+        """
+        while True:
+            try:
+                store_postbacks(records)
+                db.session.commit()
+                return
+            except Exception as e:
+                db.session.rollback()
+                if is_transient_db_error(e):
+                    print(f"Error storing postbacks, retrying: {str(e)}")
+                    time.sleep(1)
+                    continue
+                if len(records) > 1:
+                    for record in records:
+                        self.commit_batch([record])
+                    return
+                print(f"Error storing postback, set aside in rejected.jsonl: {str(e)}")
+                with open(os.path.join(self.folder, 'rejected.jsonl'), 'a') as f:
+                    f.write(json_dumps(records[0]) + '\n')
+                # Not stored, the network's retry must not be taken for a duplicate
+                if records[0].get('transaction_id'):
+                    postback_dedup_filter.forget(records[0]['tracking_id'], records[0]['transaction_id'])
+                return
+
+    def recover(self):
+        """Store the unstored tail of spools left behind by processes that are gone"""
+        if fcntl is None or not os.path.isdir(self.folder):
+            return
+        for name in sorted(os.listdir(self.folder)):
+            spool_path = os.path.join(self.folder, name)
+            if not name.startswith('spool-') or not name.endswith('.jsonl') or spool_path == self._spool_path:
+                continue
+            try:
+                spool = open(spool_path, 'rb')
+            except FileNotFoundError:
+                continue
+            with spool:
+                try:
+                    fcntl.flock(spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # Its process is still running
+                    continue
+                spool.seek(self._read_checkpoint(spool_path))
+                while True:
+                    records = [json_loads(line) for line in islice(spool, self.max_batch) if line.endswith(b'\n')]
+                    if not records:
+                        break
+                    self.commit_batch(records)
+                    self._write_checkpoint(spool_path, spool.tell())
+                if os.path.exists(f'{spool_path}.ckpt'):
+                    os.remove(f'{spool_path}.ckpt')
+                os.remove(spool_path)
+
+postback_ingestor = PostbackIngestor(
+    app.config['POSTBACK_SPOOL_FOLDER'],
+    app.config['POSTBACK_BATCH_WINDOW'],
+    app.config['POSTBACK_BATCH_MAX'],
+    app.config['POSTBACK_SPOOL_FSYNC'],
+    app.config['POSTBACK_SPOOL_MAX_BYTES']
+)
+atexit.register(postback_ingestor.close)
+
+# Add this function after existing imports
+def extract_utm_parameters(request):
+    """Extract all UTM parameters from a request"""
+    utm_params = {}
+    
+    # Common UTM parameters to extract
+    utm_fields = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content']
+    
+    for param in utm_fields:
+        value = request.args.get(param)
+        if value:
+            utm_params[param] = value
+    
+    return utm_params
+def detect_device_type(user_agent):
+    """Detect if user is on mobile, tablet, or desktop based on user agent string"""
+    user_agent = user_agent.lower()
+    
+    # Check for mobile devices first
+    if any(word in user_agent for word in ['iphone', 'android', 'mobile', 'phone']):
+        # Special check for tablets that also have "android" in their UA
+        if any(word in user_agent for word in ['ipad', 'tablet']):
+            return 'tablet'
+        return 'mobile'
+    
+    # Check for tablets
+    elif any(word in user_agent for word in ['ipad', 'tablet']):
+        return 'tablet'
+    
+    # Default to desktop
+    else:
+        return 'desktop'
+    
+@app.route('/')
+def index():
+    # Extract UTM parameters and session ID
+    utm_params = extract_utm_parameters(request)
+    session_id = request.args.get('session_id')
+    
+    # Detect device type
+    device_type = request.args.get('device')
+    if not device_type:
+        device_type = detect_device_type(request.user_agent.string)
+    
+    # Store UTM, session and device data in session if present
+    if 'utm_source' in utm_params:
+        session['utm_source'] = utm_params['utm_source']
+        session['utm_data'] = utm_params
+    
+    if session_id:
+        session['session_id'] = session_id
+        
+    # Store device type
+    session['device_type'] = device_type
+    
+    # Check if there are form_id and user_id query parameters
+    form_id = request.args.get('form_id')
+    user_id = request.args.get('user_id')
+    
+    # If both parameters exist, try to show the form
+    if form_id and user_id:
+        try:
+            form_id = int(form_id)
+            user_id = int(user_id)
+            
+            # Check if the form exists and belongs to the specified user
+            form = Form.query.filter_by(id=form_id, user_id=user_id).first()
+            
+            if form:
+                # If found, redirect to the form view - ensure we don't lose UTM parameters
+                return redirect(url_for('view_form', form_id=form_id))
+            else:
+                flash('Form not found or invalid user ID')
+        except ValueError:
+            flash('Invalid form ID or user ID')
+    
+    # If no parameters or invalid form, show the regular index page
+    return render_template('index.html')
+
+@app.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+        user = User.query.filter_by(email=email).first()
+        
+        if user and user.check_password(password):
+            login_user(user)
+            return redirect(url_for('dashboard'))
+        flash('Invalid email or password')
+    return render_template('login.html')
+
+@app.route('/signup', methods=['GET', 'POST'])
+def signup():
+    if request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+        
+        if User.query.filter_by(email=email).first():
+            flash('Email already registered')
+            return redirect(url_for('signup'))
+            
+        user = User(email=email)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        
+        login_user(user)
+        return redirect(url_for('dashboard'))
+    return render_template('signup.html')
+
+@app.route('/dashboard')
+@login_required
+def dashboard():
+    try:
+        # Get user's forms
+        forms = Form.query.filter_by(user_id=current_user.id).all()
+        
+        # Get predefined templates
+        predefined_templates = FormTemplate.query.filter_by(is_public=True).all()
+        
+        # Get user's custom templates if they exist
         user_templates = []
         if hasattr(current_user, 'templates'):
             user_templates = current_user.templates
@@ -491,36 +1731,9 @@ def create_form():
 
 @app.route('/form/<int:form_id>')
 def view_form(form_id):
-    form = Form.query.get_or_404(form_id)
-    
-    # Get all subquestions for this form
-    subquestions = SubQuestion.query.join(Question).filter(Question.form_id == form_id).all()
-
-    # Process each question to handle nested structures
-    for question in form.questions:
-        if question.question_type in ['radio', 'multiple_choice']:
-            try:
-                # Parse options with full nested structure
-                question.nested_options = json.loads(question.options or '[]')
-                
-                # If options is a plain array, convert to nested format
-                if question.nested_options and isinstance(question.nested_options[0], str):
-                    question.nested_options = [{"text": opt, "subquestions": []} for opt in question.nested_options]
-            except (json.JSONDecodeError, TypeError, IndexError):
-                # Fallback for legacy data format
-                try:
-                    raw_options = question.get_options()
-                    # Convert simple options to the nested format
-                    question.nested_options = [
-                        {"text": opt, "subquestions": []} 
-                        for opt in raw_options if opt
-                    ]
-                except Exception:
-                    # Last resort fallback
-                    question.nested_options = []
-
-    # Sort questions by order
-    form.questions.sort(key=lambda q: q.order)
+    # Compiled schema already has parsed options, nested options and questions sorted by order
+    form = get_form_schema(form_id)
+    subquestions = form.subquestions
     
     # Generate iframe embed code
     if request.headers.get('X-Forwarded-Proto'):
@@ -550,7 +1763,7 @@ def edit_form(form_id):
     # decode JSON-encoded options into a new attribute
     for q in form.questions:
         try:
-            q.parsed_options = json.loads(q.options) if q.options else []
+            q.parsed_options = json_loads(q.options) if q.options else []
         except ValueError:
             q.parsed_options = []
 
@@ -562,103 +1775,1030 @@ def logout():
     logout_user()
     return redirect(url_for('index'))
 
-# Helper function to export responses as JSON
-def export_response_to_json(response, form):
+# Helper functions to export responses as JSON
+def build_response_exports(form, responses):
     """
-    Helper function to export a single response as JSON
+    Build the export data for a batch of responses belonging to one form
+    
+    Answers, subquestion answers and company names for the whole batch are loaded
+    with one query each instead of one query per question and subquestion.
     
     Args:
-        response: The Response object to export
-        form: The Form object the response belongs to
+        form: The FormSchema of the form the responses belong to
+        responses: List of Response objects to export
         
     Returns:
-        dict: JSON-serializable dictionary of the response data
-        str: Path to the saved JSON file
+        list: JSON-serializable dictionaries, in the same order as responses
     """
-    # Create response data structure
-    response_data = {
-        'response_id': response.id,
-        'form_id': form.id,
-        'form_title': form.title,
-        'submitted_at': response.submitted_at.isoformat(),
-        'utm_data': {
-            'source': response.utm_source,
-            'medium': response.utm_medium,
-            'campaign': response.utm_campaign,
-            'content': response.utm_content,
-            'term': response.utm_term
-        },
-        'device_type': response.device_type,
-        'company_id': response.company_id,
-        'company_name': response.company.name if response.company else None,
-        'answers': []
-    }
+    response_ids = [response.id for response in responses]
+    if not response_ids:
+        return []
     
-    # Get all answers for this response
-    for question in form.questions:
-        answer = Answer.query.filter_by(
-            response_id=response.id,
-            question_id=question.id
-        ).first()
+    # First answer per (response, question), matching the old filter_by(...).first() lookups
+    answers = {}
+    answer_rows = db.session.query(Answer.response_id, Answer.question_id, Answer.answer_text).filter(
+        Answer.response_id.in_(response_ids)
+    ).order_by(Answer.id)
+    for response_id, question_id, answer_text in answer_rows:
+        answers.setdefault((response_id, question_id), answer_text)
+    
+    subquestion_answers = {}
+    sq_answer_rows = db.session.query(
+        SubQuestionAnswer.response_id, SubQuestionAnswer.subquestion_id, SubQuestionAnswer.answer_text
+    ).filter(SubQuestionAnswer.response_id.in_(response_ids)).order_by(SubQuestionAnswer.id)
+    for response_id, subquestion_id, answer_text in sq_answer_rows:
+        subquestion_answers.setdefault((response_id, subquestion_id), answer_text)
+    
+    company_ids = {response.company_id for response in responses if response.company_id}
+    company_names = {}
+    if company_ids:
+        company_names = dict(db.session.query(Company.id, Company.name).filter(Company.id.in_(company_ids)))
+    
+    exports = []
+    for response in responses:
+        # Create response data structure
+        response_data = {
+            'response_id': response.id,
+            'form_id': form.id,
+            'form_title': form.title,
+            'submitted_at': response.submitted_at.isoformat(),
+            'utm_data': {
+                'source': response.utm_source,
+                'medium': response.utm_medium,
+                'campaign': response.utm_campaign,
+                'content': response.utm_content,
+                'term': response.utm_term
+            },
+            'device_type': response.device_type,
+            'company_id': response.company_id,
+            'company_name': company_names.get(response.company_id),
+            'answers': []
+        }
         
-        if answer:
+        for question in form.questions:
+            answer_text = answers.get((response.id, question.id))
+            if answer_text is None:
+                continue
+            
             answer_data = {
                 'question_id': question.id,
                 'question_text': question.question_text,
                 'question_type': question.question_type,
-                'answer_text': answer.answer_text
+                'answer_text': answer_text
             }
             
             # Get subquestion answers if applicable
             if question.question_type in ['radio', 'multiple_choice', 'checkbox']:
                 # Get selected options
-                selected_options = answer.answer_text.split(', ') if question.question_type == 'checkbox' else [answer.answer_text]
-                
-                # Get all subquestions for this question
-                subquestions = SubQuestion.query.filter_by(question_id=question.id).all()
+                selected_options = answer_text.split(', ') if question.question_type == 'checkbox' else [answer_text]
                 
-                subquestion_answers = []
-                for subq in subquestions:
+                sq_answers = []
+                for parent_option, subquestions in form.subquestion_index.get(question.id, {}).items():
                     # Only include subquestions matching selected parent options
-                    if any(opt in subq.parent_option for opt in selected_options):
-                        sq_answer = SubQuestionAnswer.query.filter_by(
-                            response_id=response.id,
-                            subquestion_id=subq.id
-                        ).first()
-                        
-                        if sq_answer:
-                            subquestion_answers.append({
+                    if not any(opt in parent_option for opt in selected_options):
+                        continue
+                    
+                    for subq in subquestions:
+                        sq_answer_text = subquestion_answers.get((response.id, subq.id))
+                        if sq_answer_text is not None:
+                            sq_answers.append({
                                 'subquestion_id': subq.id,
                                 'subquestion_text': subq.question_text,
                                 'subquestion_type': subq.question_type,
                                 'parent_option': subq.parent_option,
-                                'answer_text': sq_answer.answer_text
+                                'answer_text': sq_answer_text
                             })
                 
                 # Add subquestion answers if any exist
-                if subquestion_answers:
-                    answer_data['subquestion_answers'] = subquestion_answers
+                if sq_answers:
+                    answer_data['subquestion_answers'] = sq_answers
             
             response_data['answers'].append(answer_data)
+        
+        exports.append(response_data)
     
+    return exports
+
+# Exported responses are bucketed as <RESPONSE_EXPORT_FOLDER>/form_<id>/<YYYY-MM-DD>/, so
+# deleting or listing a form's exports never scans the files of other forms
+RESPONSE_EXPORT_FILENAME = re.compile(r'^response_(\d+)_(\d+)_(\d{8})(\d{6})\.json$')
+
+def response_export_form_dir(form_id):
+    return os.path.join(app.config['RESPONSE_EXPORT_FOLDER'], f'form_{form_id}')
+
+def response_export_dir(form_id, submitted_at):
+    return os.path.join(response_export_form_dir(form_id), submitted_at.strftime('%Y-%m-%d'))
+
+def list_response_export_files(form_id):
+    """Return the paths of a form's exported response files, oldest day first (bundles are not included)"""
+    form_dir = response_export_form_dir(form_id)
+    if not os.path.isdir(form_dir):
+        return []
+    paths = []
+    for day in sorted(os.listdir(form_dir)):
+        day_dir = os.path.join(form_dir, day)
+        if os.path.isdir(day_dir):
+            paths.extend(os.path.join(day_dir, filename) for filename in sorted(os.listdir(day_dir)))
+    return paths
+
+def write_response_export(response_data, response):
+    """Write one response's export data to its form and day bucket and return the file path"""
     # Create export directory if it doesn't exist
-    export_path = os.path.join('exports', 'survey_responses')
+    export_path = response_export_dir(response.form_id, response.submitted_at)
     os.makedirs(export_path, exist_ok=True)
     
     # Create filename with form ID, response ID and timestamp
     timestamp = response.submitted_at.strftime('%Y%m%d%H%M%S')
-    filename = f"response_{form.id}_{response.id}_{timestamp}.json"
+    filename = f"response_{response.form_id}_{response.id}_{timestamp}.json"
     file_path = os.path.join(export_path, filename)
     
     # Write response to JSON file
-    with open(file_path, 'w') as json_file:
-        json.dump(response_data, json_file, indent=2)
+    with open(file_path, 'wb') as json_file:
+        json_file.write(json_dumps_bytes(response_data, indent=True))
+    
+    return file_path
+
+def rebucket_response_exports():
+    """
+    Move response exports written to the flat RESPONSE_EXPORT_FOLDER by earlier
+    versions into their form and day buckets, returns the number of files moved
+    """
+    root = app.config['RESPONSE_EXPORT_FOLDER']
+    if not os.path.isdir(root):
+        return 0
+    moved = 0
+    with os.scandir(root) as entries:
+        for entry in entries:
+            match = RESPONSE_EXPORT_FILENAME.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            form_id, _, day, _ = match.groups()
+            bucket = os.path.join(response_export_form_dir(form_id), f'{day[:4]}-{day[4:6]}-{day[6:]}')
+            os.makedirs(bucket, exist_ok=True)
+            os.replace(entry.path, os.path.join(bucket, entry.name))
+            moved += 1
+    return moved
+
+class ResponseExportBundles:
+    """
+    Export backend that appends responses to rolling per-form bundles
     
+    Instead of one JSON file per response, each form's bucket holds
+    bundle-<seq>.jsonl files with one compact JSON response per line, and
+    bundle.idx, a list of fixed-size (response ID, bundle, offset, length)
+    records. A bundle is rotated once it reaches `max_bytes` or is
+    `rotate_seconds` old; its sequence number is the Unix time it was started.
+    
+    Appends take a flock on the index so export workers of several processes
+    can share a form's bundles. The index is loaded into memory per form and
+    read incrementally afterwards, so a response is found by ID with a dict
+    lookup and a single read.
+    """
+    INDEX_RECORD = struct.Struct('<QIQI')
+    BUNDLE_FILENAME = re.compile(r'^bundle-(\d+)\.jsonl$')
+
+    def __init__(self, max_bytes, rotate_seconds, cached_indexes=16):
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.cached_indexes = cached_indexes
+        self._indexes = OrderedDict()  # form_id -> [index bytes read, {response_id: (seq, offset, length)}]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bundle_path(form_id, seq):
+        return os.path.join(response_export_form_dir(form_id), f'bundle-{seq}.jsonl')
+
+    def _current_bundle(self, form_id):
+        """Return the sequence number of the bundle to append to, starting a new one if needed"""
+        form_dir = response_export_form_dir(form_id)
+        seqs = [int(match.group(1)) for match in map(self.BUNDLE_FILENAME.match, os.listdir(form_dir)) if match]
+        now = int(time.time())
+        if seqs:
+            seq = max(seqs)
+            if os.path.getsize(self.bundle_path(form_id, seq)) < self.max_bytes and now - seq < self.rotate_seconds:
+                return seq
+            return max(now, seq + 1)
+        return now
+
+    def append(self, form_id, items):
+        """Append (response ID, export data) pairs to the form's current bundle, returns the bundle path"""
+        os.makedirs(response_export_form_dir(form_id), exist_ok=True)
+        with open(os.path.join(response_export_form_dir(form_id), 'bundle.idx'), 'ab') as index:
+            if fcntl is not None:
+                fcntl.flock(index.fileno(), fcntl.LOCK_EX)
+            # Drop a record torn by a crash
+            size = index.seek(0, os.SEEK_END)
+            if size % self.INDEX_RECORD.size:
+                index.truncate(size - size % self.INDEX_RECORD.size)
+            
+            seq = self._current_bundle(form_id)
+            path = self.bundle_path(form_id, seq)
+            with open(path, 'a+b') as bundle:
+                offset = bundle.seek(0, os.SEEK_END)
+                lines = []
+                if offset:
+                    bundle.seek(offset - 1)
+                    if bundle.read(1) != b'\n':
+                        # Line torn by a crash, it is not in the index
+                        lines.append(b'\n')
+                        offset += 1
+                records = []
+                for response_id, response_data in items:
+                    line = json_dumps_bytes(response_data)
+                    lines.append(line + b'\n')
+                    records.append(self.INDEX_RECORD.pack(response_id, seq, offset, len(line)))
+                    offset += len(line) + 1
+                bundle.write(b''.join(lines))
+            # The index is written after the lines it points to
+            index.write(b''.join(records))
+        return path
+
+    def _load_index(self, form_id):
+        """Return the form's {response_id: (seq, offset, length)} index, reading records appended since the last call"""
+        entry = self._indexes.get(form_id)
+        if entry is None:
+            entry = self._indexes[form_id] = [0, {}]
+            while len(self._indexes) > self.cached_indexes:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(form_id)
+        
+        try:
+            with open(os.path.join(response_export_form_dir(form_id), 'bundle.idx'), 'rb') as index:
+                index.seek(entry[0])
+                data = index.read()
+        except FileNotFoundError:
+            return entry[1]
+        usable = len(data) - len(data) % self.INDEX_RECORD.size
+        for response_id, seq, offset, length in self.INDEX_RECORD.iter_unpack(data[:usable]):
+            entry[1][response_id] = (seq, offset, length)
+        entry[0] += usable
+        return entry[1]
+
+    def read(self, form_id, response_id):
+        """Return the exported data of a response, or None if it is not in the form's bundles"""
+        with self._lock:
+            location = self._load_index(form_id).get(response_id)
+        if location is None:
+            return None
+        seq, offset, length = location
+        try:
+            with open(self.bundle_path(form_id, seq), 'rb') as bundle:
+                bundle.seek(offset)
+                return json_loads(bundle.read(length))
+        except FileNotFoundError:
+            return None
+
+    def invalidate(self, form_id):
+        with self._lock:
+            self._indexes.pop(form_id, None)
+
+response_export_bundles = ResponseExportBundles(
+    app.config['RESPONSE_EXPORT_BUNDLE_MAX_BYTES'],
+    app.config['RESPONSE_EXPORT_BUNDLE_ROTATE_SECONDS']
+)
+
+def write_response_exports(form_id, responses_data, responses):
+    """Write the export data of responses of one form with the configured backend, returns the path of each"""
+    if app.config['RESPONSE_EXPORT_BACKEND'] == 'bundle':
+        path = response_export_bundles.append(form_id, [
+            (response.id, response_data) for response_data, response in zip(responses_data, responses)
+        ])
+        return [path] * len(responses)
+    return [write_response_export(response_data, response) for response_data, response in zip(responses_data, responses)]
+
+def load_exported_response(response):
+    """Return the exported data of a response from either backend, or None if it was not exported"""
+    data = response_export_bundles.read(response.form_id, response.id)
+    if data is not None:
+        return data
+    filename = f"response_{response.form_id}_{response.id}_{response.submitted_at.strftime('%Y%m%d%H%M%S')}.json"
+    try:
+        with open(os.path.join(response_export_dir(response.form_id, response.submitted_at), filename), 'rb') as json_file:
+            return json_loads(json_file.read())
+    except FileNotFoundError:
+        return None
+
+def export_response_to_json(response, form):
+    """
+    Helper function to export a single response as JSON
+    
+    Args:
+        response: The Response object to export
+        form: The FormSchema of the form the response belongs to
+        
+    Returns:
+        dict: JSON-serializable dictionary of the response data
+        str: Path to the saved JSON file, or to the bundle it was appended to
+    """
+    response_data = build_response_exports(form, [response])[0]
+    file_path = write_response_exports(response.form_id, [response_data], [response])[0]
     return response_data, file_path
 
+def iter_form_response_exports(form, batch_size):
+    """
+    Yield export data for every response of a form, oldest first
+    
+    Responses are fetched with keyset pagination on their ID, and each page is
+    built with build_response_exports, so only one page is held in memory.
+    """
+    last_id = 0
+    while True:
+        responses = Response.query.filter(
+            Response.form_id == form.id,
+            Response.id > last_id
+        ).order_by(Response.id).limit(batch_size).all()
+        if not responses:
+            return
+        last_id = responses[-1].id
+        yield from build_response_exports(form, responses)
+
+def iter_json_array(items, indent=2):
+    """
+    Serialize an iterable as a JSON array chunk by chunk, indented by 2 spaces like
+    json_dumps(..., indent=True), or compact JSON without whitespace when indent is None
+    """
+    first = True
+    if indent is None:
+        for item in items:
+            yield ('[' if first else ',') + json_dumps(item)
+            first = False
+        yield '[]' if first else ']'
+        return
+    for item in items:
+        yield ('[\n  ' if first else ',\n  ') + json_dumps(item, indent=True).replace('\n', '\n  ')
+        first = False
+    yield '[]' if first else '\n]'
+
+def negotiate_export_encoding():
+    """Return the best of zstd and gzip the client accepts, or None to send the export uncompressed"""
+    accepted = request.accept_encodings
+    best = None
+    # zstd wins ties, it is faster at a similar ratio
+    for encoding in (['zstd'] if zstandard is not None else []) + ['gzip']:
+        if accepted[encoding] > 0 and (best is None or accepted[encoding] > accepted[best]):
+            best = encoding
+    return best
+
+def iter_compressed(chunks, encoding):
+    """Compress a stream of text chunks with gzip or zstd, yielding compressed data as the compressor emits it"""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=app.config['EXPORT_ZSTD_LEVEL']).compressobj()
+    else:
+        compressor = zlib.compressobj(app.config['EXPORT_GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+# Columnar response snapshots
+#
+# Reporting jobs read responses from per-form snapshot directories instead of the live
+# database. Every column is a flat file of fixed-width values in native byte order, so
+# it can be memory-mapped and used without copying. Text columns (UTM fields, device
+# type and the answer of every question) are dictionary encoded: the file holds uint32
+# codes into <column>.dict.jsonl, one JSON value per line, and code 0 means no value.
+#
+# Snapshots only ever grow. meta.json is replaced last and is the commit point, so a
+# reader never sees a half-written batch: files may hold rows past meta['rows'] after a
+# crash, and the next update truncates them before appending.
+
+RESPONSE_SNAPSHOT_FORMAT = 1
+RESPONSE_SNAPSHOT_EPOCH = datetime(1970, 1, 1)
+
+# (column, array type code, dictionary encoded)
+RESPONSE_SNAPSHOT_COLUMNS = (
+    ('response_id', 'q', False),
+    ('submitted_at', 'd', False),  # Seconds since the epoch, UTC
+    ('company_id', 'q', False),    # -1 when the response has no company
+    ('score', 'd', False),         # NaN when the response was not graded
+    ('max_score', 'd', False),
+    ('passed', 'b', False),        # -1 when the response was not graded
+    ('utm_source', 'I', True),
+    ('utm_medium', 'I', True),
+    ('utm_campaign', 'I', True),
+    ('device_type', 'I', True),
+)
+
+def response_snapshot_path(form_id):
+    return os.path.join(app.config['RESPONSE_SNAPSHOT_FOLDER'], f'form_{form_id}')
+
+def read_response_snapshot_meta(path):
+    """Return the committed meta.json of a snapshot directory, or None if there is none"""
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_response_snapshot_meta(path, meta):
+    tmp_path = os.path.join(path, 'meta.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+class SnapshotColumnWriter:
+    """Appends values to one column file, and to its dictionary for dictionary-encoded columns"""
+
+    def __init__(self, path, column, rows):
+        self.column = column
+        self.itemsize = array(column['type']).itemsize
+        self._file = self._open(os.path.join(path, column['file']), rows * self.itemsize)
+        self._dictionary = None
+        if column['dictionary']:
+            self._dictionary_file = self._open(os.path.join(path, column['dictionary_file']), column['dictionary_bytes'])
+            self._dictionary_file.seek(0)
+            self._dictionary = {
+                json_loads(line): code
+                for code, line in enumerate(self._dictionary_file.read().splitlines(), start=1)
+            }
+
+    @staticmethod
+    def _open(file_path, size):
+        """Open a column file for appending at the committed size, cutting or zero-filling it to that size"""
+        f = open(file_path, 'r+b' if os.path.exists(file_path) else 'w+b')
+        f.truncate(size)
+        f.seek(size)
+        return f
+
+    def encode(self, value):
+        """Return the dictionary code of a value, adding it to the dictionary if it is new"""
+        if value is None:
+            return 0
+        code = self._dictionary.get(value)
+        if code is None:
+            code = len(self._dictionary) + 1
+            self._dictionary[value] = code
+            self._dictionary_file.write(json_dumps_bytes(value) + b'\n')
+        return code
+
+    def append(self, values):
+        values.tofile(self._file)
+
+    def flush(self):
+        """Flush pending writes and record the committed sizes in the column's metadata"""
+        self._file.flush()
+        if self._dictionary is not None:
+            self._dictionary_file.flush()
+            self.column['dictionary_size'] = len(self._dictionary)
+            self.column['dictionary_bytes'] = self._dictionary_file.tell()
+
+    def close(self):
+        self._file.close()
+        if self._dictionary is not None:
+            self._dictionary_file.close()
+
+def new_snapshot_column(name, type_code, dictionary, **extra):
+    column = {'name': name, 'type': type_code, 'dictionary': dictionary, 'file': f'{name}.col'}
+    if dictionary:
+        column.update(dictionary_file=f'{name}.dict.jsonl', dictionary_size=0, dictionary_bytes=0)
+    column.update(extra)
+    return column
+
+def update_response_snapshot(form, batch_size=None):
+    """
+    Append the responses submitted since the last snapshot of a form to its snapshot
+    
+    The snapshot is created on first use, and rebuilt if it was written by another
+    snapshot format or on a machine with a different byte order. Questions added to
+    the form since the last snapshot get a new column, with code 0 for earlier rows.
+    Returns the number of responses appended.
+    """
+    batch_size = batch_size or app.config['RESPONSE_SNAPSHOT_BATCH_SIZE']
+    path = response_snapshot_path(form.id)
+    os.makedirs(path, exist_ok=True)
+    
+    with open(os.path.join(path, 'lock'), 'w') as lock:
+        # One writer per snapshot, readers don't need the lock
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        
+        meta = read_response_snapshot_meta(path)
+        if meta is None or meta.get('format') != RESPONSE_SNAPSHOT_FORMAT or meta.get('byteorder') != sys.byteorder:
+            for name in os.listdir(path):
+                if name.endswith('.col') or name.endswith('.dict.jsonl'):
+                    os.remove(os.path.join(path, name))
+            meta = {
+                'format': RESPONSE_SNAPSHOT_FORMAT,
+                'byteorder': sys.byteorder,
+                'form_id': form.id,
+                'rows': 0,
+                'last_response_id': 0,
+                'columns': [new_snapshot_column(*column) for column in RESPONSE_SNAPSHOT_COLUMNS],
+            }
+        
+        columns = OrderedDict((column['name'], column) for column in meta['columns'])
+        for question in form.questions:
+            name = f'q_{question.id}'
+            if name not in columns:
+                columns[name] = new_snapshot_column(name, 'I', True, question_id=question.id)
+            columns[name].update(question_text=question.question_text, question_type=question.question_type)
+        meta['columns'] = list(columns.values())
+        
+        rows = meta['rows']
+        writers = OrderedDict()
+        try:
+            for name, column in columns.items():
+                # Columns of new questions are zero-filled, earlier responses did not answer them
+                writers[name] = SnapshotColumnWriter(path, column, rows)
+            
+            question_columns = {
+                column['question_id']: name for name, column in columns.items() if column.get('question_id') is not None
+            }
+            appended = 0
+            while True:
+                batch = db.session.query(
+                    Response.id, Response.submitted_at, Response.company_id, Response.score,
+                    Response.max_score, Response.passed, Response.utm_source, Response.utm_medium,
+                    Response.utm_campaign, Response.device_type
+                ).filter(
+                    Response.form_id == form.id,
+                    Response.id > meta['last_response_id']
+                ).order_by(Response.id).limit(batch_size).all()
+                if not batch:
+                    break
+                
+                row_of = {response.id: row for row, response in enumerate(batch)}
+                answers = {name: array('I', bytes(4 * len(batch))) for name in question_columns.values()}
+                for response_id, question_id, answer_text in db.session.query(
+                    Answer.response_id, Answer.question_id, Answer.answer_text
+                ).filter(Answer.response_id.in_(list(row_of))):
+                    name = question_columns.get(question_id)
+                    if name is not None:
+                        answers[name][row_of[response_id]] = writers[name].encode(answer_text)
+                
+                writers['response_id'].append(array('q', [response.id for response in batch]))
+                writers['submitted_at'].append(array('d', [
+                    (response.submitted_at - RESPONSE_SNAPSHOT_EPOCH).total_seconds() if response.submitted_at else float('nan')
+                    for response in batch
+                ]))
+                writers['company_id'].append(array('q', [
+                    response.company_id if response.company_id is not None else -1 for response in batch
+                ]))
+                for name in ('score', 'max_score'):
+                    writers[name].append(array('d', [
+                        getattr(response, name) if getattr(response, name) is not None else float('nan') for response in batch
+                    ]))
+                writers['passed'].append(array('b', [
+                    -1 if response.passed is None else int(response.passed) for response in batch
+                ]))
+                for name in ('utm_source', 'utm_medium', 'utm_campaign', 'device_type'):
+                    writer = writers[name]
+                    writer.append(array('I', [writer.encode(getattr(response, name)) for response in batch]))
+                for name, values in answers.items():
+                    writers[name].append(values)
+                
+                for writer in writers.values():
+                    writer.flush()
+                meta['rows'] += len(batch)
+                meta['last_response_id'] = batch[-1].id
+                meta['updated_at'] = datetime.utcnow().isoformat()
+                write_response_snapshot_meta(path, meta)
+                appended += len(batch)
+            
+            if not appended:
+                # Still record question columns added since the last update
+                for writer in writers.values():
+                    writer.flush()
+                write_response_snapshot_meta(path, meta)
+            return appended
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+class ResponseSnapshot:
+    """
+    Read-only view of a form's response snapshot
+    
+    column() returns a memoryview over the memory-mapped column file, cast to the
+    column's type, so loading a snapshot does not copy or parse the data. Views
+    must not be used after close().
+    
+        with ResponseSnapshot.open(form_id) as snapshot:
+            sources = snapshot.dictionary('utm_source')
+            for code in snapshot.column('utm_source'):
+                ...
+    """
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.rows = meta['rows']
+        self.columns = OrderedDict((column['name'], column) for column in meta['columns'])
+        self._maps = []
+        self._views = []
+        self._dictionaries = {}
+
+    @classmethod
+    def open(cls, form_id):
+        """Open the latest committed snapshot of a form, or return None if it has none"""
+        path = response_snapshot_path(form_id)
+        meta = read_response_snapshot_meta(path)
+        if meta is None:
+            return None
+        if meta.get('byteorder') != sys.byteorder:
+            raise ValueError(f'Snapshot of form {form_id} was written with {meta.get("byteorder")} byte order')
+        return cls(path, meta)
+
+    def column(self, name):
+        """Return the first `rows` values of a column as a zero-copy memoryview"""
+        column = self.columns[name]
+        size = self.rows * array(column['type']).itemsize
+        if size == 0:
+            return memoryview(array(column['type']))
+        with open(os.path.join(self.path, column['file']), 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        view = memoryview(mapped).cast(column['type'])
+        self._views.append(view)
+        return view
+
+    def dictionary(self, name):
+        """Return the values of a dictionary-encoded column indexed by code, code 0 is None"""
+        if name not in self._dictionaries:
+            column = self.columns[name]
+            values = [None]
+            with open(os.path.join(self.path, column['dictionary_file']), 'rb') as f:
+                for line in islice(f, column['dictionary_size']):
+                    values.append(json_loads(line))
+            self._dictionaries[name] = values
+        return self._dictionaries[name]
+
+    def decode(self, name):
+        """Iterate over the values of a column, decoding dictionary codes"""
+        values = self.column(name)
+        if not self.columns[name]['dictionary']:
+            return iter(values)
+        dictionary = self.dictionary(name)
+        return (dictionary[code] for code in values)
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._views = []
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ResponseExportWorker:
+    """
+    Background thread that writes submitted responses to their exports/survey_responses bucket
+    
+    submit_form only enqueues the new response ID. The worker collects IDs into
+    batches, claims them by stamping Response.exported_at and then builds their
+    export data with a handful of queries. Responses that are still unexported
+    (e.g. queued when the process stopped) are picked up by a periodic sweep, so
+    the export survives restarts, and the claim keeps processes that sweep at the
+    same time from exporting a response twice.
+    """
+
+    def __init__(self, batch_size, interval, sweep_interval):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.sweep_interval = sweep_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread if it is not running yet"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='response-export-worker', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, response_id):
+        self.start()
+        self._queue.put(response_id)
+
+    def _collect_batch(self):
+        """Wait up to `interval` seconds and return the queued response IDs"""
+        response_ids = []
+        deadline = time.monotonic() + self.interval
+        while len(response_ids) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                response_ids.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return response_ids
+
+    def _run(self):
+        next_sweep = 0
+        while True:
+            response_ids = self._collect_batch()
+            with app.app_context():
+                try:
+                    if response_ids:
+                        self.export_ids(response_ids)
+                    if time.monotonic() >= next_sweep:
+                        self.export_pending()
+                        next_sweep = time.monotonic() + self.sweep_interval
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error exporting responses: {str(e)}")
+                finally:
+                    db.session.remove()
+
+    def export_ids(self, response_ids):
+        responses = Response.query.filter(
+            Response.id.in_(response_ids),
+            Response.exported_at.is_(None)
+        ).order_by(Response.id).all()
+        return self.export_batch(responses)
+
+    def export_pending(self):
+        """Export every response that has not been exported yet, in ID order"""
+        exported = 0
+        last_id = 0
+        while True:
+            responses = Response.query.filter(
+                Response.exported_at.is_(None),
+                Response.id > last_id
+            ).order_by(Response.id).limit(self.batch_size).all()
+            if not responses:
+                return exported
+            last_id = responses[-1].id
+            exported += self.export_batch(responses)
+
+    def export_batch(self, responses):
+        """
+        Export the given responses with the configured backend and mark them as exported
+        
+        Each form's responses are exported and committed on their own. If a form's
+        group fails, its responses are retried one by one, and the ones that still
+        fail are logged and left for the next sweep, so a single bad response or a
+        deleted form doesn't hold up the rest of the export.
+        """
+        by_form = OrderedDict()
+        for response in responses:
+            by_form.setdefault(response.form_id, []).append(response)
+        
+        exported = 0
+        for form_id, form_responses in by_form.items():
+            response_ids = [response.id for response in form_responses]
+            count = self.export_group(form_id, form_responses)
+            if count is not None:
+                exported += count
+            elif len(response_ids) > 1:
+                for response_id in response_ids:
+                    response = db.session.get(Response, response_id)
+                    if response is not None:
+                        exported += self.export_group(form_id, [response]) or 0
+        return exported
+
+    def export_group(self, form_id, responses):
+        """
+        Export responses of one form, returns how many were exported or None if that failed
+        
+        The responses are claimed first by setting exported_at where it is still
+        NULL and committing, so of several processes sweeping at once only the one
+        whose update took a row writes it. The claim is released if the export fails.
+        """
+        response_ids = [response.id for response in responses]
+        claimed_at = datetime.utcnow()
+        try:
+            claimed = Response.query.filter(
+                Response.id.in_(response_ids),
+                Response.exported_at.is_(None)
+            ).update({Response.exported_at: claimed_at}, synchronize_session=False)
+            db.session.commit()
+            if claimed < len(response_ids):
+                # Another process claimed some of them first
+                claimed_ids = {row.id for row in db.session.query(Response.id).filter(
+                    Response.id.in_(response_ids),
+                    Response.exported_at == claimed_at
+                )}
+                responses = [response for response in responses if response.id in claimed_ids]
+                response_ids = [response.id for response in responses]
+            if not responses:
+                return 0
+            
+            form = get_form_schema(form_id)
+            write_response_exports(form_id, build_response_exports(form, responses), responses)
+            return len(responses)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error exporting responses {response_ids} of form {form_id}: {str(e)}")
+            # Release the claim so the next sweep retries them
+            Response.query.filter(
+                Response.id.in_(response_ids),
+                Response.exported_at == claimed_at
+            ).update({Response.exported_at: None}, synchronize_session=False)
+            db.session.commit()
+            return None
+
+response_export_worker = ResponseExportWorker(
+    app.config['RESPONSE_EXPORT_BATCH_SIZE'],
+    app.config['RESPONSE_EXPORT_INTERVAL'],
+    app.config['RESPONSE_EXPORT_SWEEP_INTERVAL']
+)
+
+@app.before_request
+def start_background_workers():
+    # Started lazily so CLI commands such as `flask db upgrade` don't spawn threads
+    response_export_worker.start()
+    pdf_extraction_worker.start()
+    if app.config['POSTBACK_INGEST_ASYNC']:
+        postback_ingestor.start()
+
+def load_subquestion_index(form_id):
+    """
+    Load every subquestion of a form with a single query
+    
+    Args:
+        form_id: ID of the form whose subquestions should be loaded
+        
+    Returns:
+        dict: {question_id: {parent_option: [SubQuestion, ...]}}
+    """
+    subquestions = SubQuestion.query.join(Question).filter(
+        Question.form_id == form_id
+    ).order_by(SubQuestion.question_id, SubQuestion.id).all()
+    
+    subquestion_index = {}
+    for subq in subquestions:
+        options = subquestion_index.setdefault(subq.question_id, {})
+        options.setdefault(subq.parent_option, []).append(subq)
+    
+    return subquestion_index
+
+def insert_returning_ids(table, rows):
+    """
+    Insert rows into a table and return their primary keys in the order of `rows`
+
+    Uses a single INSERT ... RETURNING where the database supports it and falls back
+    to one INSERT per row otherwise.
+    """
+    if not rows:
+        return []
+    if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+        return db.session.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+    return [
+        db.session.execute(insert(table).values(**row)).inserted_primary_key[0]
+        for row in rows
+    ]
+
+def insert_submissions(submissions):
+    """
+    Insert submitted responses and their answers in bulk
+
+    The response rows are inserted with a single INSERT ... RETURNING to get their IDs,
+    then the answers and subquestion answers of every submission go out with one
+    executemany per table. The caller commits.
+
+    Args:
+        submissions: list of (response_values, answer_rows, subquestion_answer_rows)
+            where the answer rows are dicts without response_id
+
+    Returns:
+        list: response IDs in the order of `submissions`
+    """
+    response_ids = insert_returning_ids(
+        Response.__table__,
+        [response_values for response_values, _, _ in submissions]
+    )
+
+    answer_rows = []
+    subquestion_answer_rows = []
+    for response_id, (_, answers, subquestion_answers) in zip(response_ids, submissions):
+        answer_rows.extend(dict(row, response_id=response_id) for row in answers)
+        subquestion_answer_rows.extend(dict(row, response_id=response_id) for row in subquestion_answers)
+
+    if answer_rows:
+        db.session.execute(insert(Answer.__table__), answer_rows)
+    if subquestion_answer_rows:
+        db.session.execute(insert(SubQuestionAnswer.__table__), subquestion_answer_rows)
+
+    return response_ids
+
+class SubmissionGroupCommitter:
+    """
+    Background thread that commits concurrent submissions in one transaction
+
+    Request threads hand their rows to the writer and wait for the response ID.
+    The writer waits up to `window` seconds for more submissions to arrive (at most
+    `max_batch`), inserts them with insert_submissions() and commits once, so a burst
+    of submits shares a single fsync. If a group fails, its submissions are retried
+    one per transaction so a bad row only fails its own request.
+
+    A request that times out cancels its submission if the writer has not picked it
+    up yet, so a retry can't store it twice. Otherwise it waits one more timeout for
+    the commit already under way before reporting the failure.
+    """
+
+    def __init__(self, window, max_batch, timeout):
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the writer thread if it is not running yet"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='submission-group-committer', daemon=True)
+                self._thread.start()
+
+    def submit(self, response_values, answers, subquestion_answers):
+        """Queue a submission and block until its group has committed, returning the response ID"""
+        self.start()
+        future = Future()
+        self._queue.put(((response_values, answers, subquestion_answers), future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                # Still queued, the writer will skip it and a retry can't duplicate it
+                raise FutureTimeoutError('the submission was not saved in time, please try again')
+        # Already being committed, give that commit one more timeout to finish
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise FutureTimeoutError('the submission was not saved in time, please try again')
+
+    def _collect_batch(self):
+        """Block for the first submission, then gather any that arrive within `window` seconds"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Drop submissions cancelled by a timed-out request, the rest can't be cancelled from here on
+            batch = [item for item in self._collect_batch() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            with app.app_context():
+                try:
+                    self.commit_batch(batch)
+                finally:
+                    db.session.remove()
+
+    def commit_batch(self, batch):
+        try:
+            response_ids = insert_submissions([submission for submission, _ in batch])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+            else:
+                for item in batch:
+                    self.commit_batch([item])
+            return
+
+        for (_, future), response_id in zip(batch, response_ids):
+            future.set_result(response_id)
+
+submission_committer = SubmissionGroupCommitter(
+    app.config['SUBMIT_GROUP_COMMIT_WINDOW'],
+    app.config['SUBMIT_GROUP_COMMIT_MAX'],
+    app.config['SUBMIT_GROUP_COMMIT_TIMEOUT']
+)
+
+def save_submission(response_values, answers, subquestion_answers):
+    """
+    Persist a submission and return the new response ID
+
+    Goes through the group committer when SUBMIT_GROUP_COMMIT is on, otherwise
+    inserts and commits in the current session.
+    """
+    if app.config['SUBMIT_GROUP_COMMIT']:
+        return submission_committer.submit(response_values, answers, subquestion_answers)
+
+    response_id = insert_submissions([(response_values, answers, subquestion_answers)])[0]
+    db.session.commit()
+    return response_id
+
 @app.route('/form/<int:form_id>/submit', methods=['POST'])
 def submit_form(form_id):
-    form = Form.query.get_or_404(form_id)
+    form = get_form_schema(form_id)
     
     # Check if the form is closed
     if form.is_closed:
@@ -695,9 +2835,10 @@ def submit_form(form_id):
         # Get UTM data safely using nested get calls with defaults
         utm_data = session.get('utm_data', {})
         
-        # Create response
-        response = Response(
+        # Response row, inserted together with its answers once everything is collected
+        response_values = dict(
             form_id=form_id,
+            submitted_at=datetime.utcnow(),
             company_id=company_id,
             # Add UTM parameters from session
             utm_source=session.get('utm_source'),
@@ -708,10 +2849,15 @@ def submit_form(form_id):
             # Device type
             device_type=session.get('device_type', 'desktop'),
             # Set privacy consent
-            has_consent=form.requires_consent and request.form.get('privacy_consent') == 'on'
+            has_consent=form.requires_consent and request.form.get('privacy_consent') == 'on',
+            score=None,
+            max_score=None,
+            passed=None
         )
-        db.session.add(response)
-        db.session.flush()  # Assign ID without committing
+        
+        # Answer rows for the bulk insert, response_id is filled in when the response is written
+        answer_rows = []
+        subquestion_answer_rows = []
         
         # Process form data
         form_data = request.form.to_dict(flat=False)
@@ -721,10 +2867,11 @@ def submit_form(form_id):
         for key, value in form_data.items():
             print(f"{key}: {value}")
         
-        # Variables for quiz scoring
-        total_score = 0
-        max_possible_score = 0
-        answered_questions = []
+        # Subquestions are pre-indexed by question and parent option in the compiled schema
+        subquestion_index = form.subquestion_index
+        
+        # Answered questions, graded against the precompiled quiz answer keys afterwards
+        answered_questions = {}
         
         # Handle main questions
         for question in form.questions:
@@ -740,48 +2887,23 @@ def submit_form(form_id):
                 answer_text = values[0] if values else None
                 
             if answer_text:
-                answer = Answer(
-                    response_id=response.id,
-                    question_id=question.id,
-                    answer_text=answer_text
-                )
-                db.session.add(answer)
-                answered_questions.append(question.id)
-                
-                # Calculate score for quiz questions
-                if form.is_quiz and question.is_quiz_question:
-                    max_possible_score += question.points
-                    
-                    # Check if answer is correct based on question type
-                    if question.correct_answer:
-                        correct_answer = json.loads(question.correct_answer)
-                        
-                        # For multiple choice and radio questions, check if the selected option matches
-                        if question.question_type in ['radio', 'multiple_choice']:
-                            # Correct answer is stored as the index of the option
-                            try:
-                                options = json.loads(question.options) if question.options else []
-                                # If answer_text matches the text of the correct option, it's correct
-                                if options and int(correct_answer) < len(options):
-                                    correct_option_text = options[int(correct_answer)]['text']
-                                    if answer_text == correct_option_text:
-                                        total_score += question.points
-                            except (ValueError, IndexError, json.JSONDecodeError) as e:
-                                print(f"Error checking quiz answer: {str(e)}")
-                        # For text, email, number, etc. - direct comparison
-                        elif answer_text == correct_answer:
-                            total_score += question.points
+                answer_rows.append({
+                    'question_id': question.id,
+                    'answer_text': answer_text
+                })
+                answered_questions[question.id] = answer_text
                 
                 # If this is a choice question and has subquestions, check for selected option
                 if question.question_type in ['radio', 'multiple_choice', 'checkbox'] and answer_text:
                     selected_options = answer_text.split(', ') if question.question_type == 'checkbox' else [answer_text]
                     
                     # Process all subquestions directly using subq_id pattern
-                    subquestions = SubQuestion.query.filter_by(question_id=question.id).all()
-                    
-                    for subq in subquestions:
+                    for parent_option, subquestions in subquestion_index.get(question.id, {}).items():
                         # Only process subquestions matching the selected parent option
-                        if any(opt in subq.parent_option for opt in selected_options):
+                        if not any(opt in parent_option for opt in selected_options):
+                            continue
+                        
+                        for subq in subquestions:
                             subq_field_name = f'subq_{subq.id}'
                             
                             if subq.question_type == 'checkbox':
@@ -792,32 +2914,24 @@ def submit_form(form_id):
                                 subq_answer = subq_values[0] if subq_values else None
                             
                             if subq_answer:
-                                sq_answer = SubQuestionAnswer(
-                                    response_id=response.id,
-                                    subquestion_id=subq.id,
-                                    selected_option=subq_answer if subq.question_type in ['radio', 'multiple_choice', 'checkbox'] else None,
-                                    answer_text=subq_answer
-                                )
-                                db.session.add(sq_answer)
+                                subquestion_answer_rows.append({
+                                    'subquestion_id': subq.id,
+                                    'selected_option': subq_answer if subq.question_type in ['radio', 'multiple_choice', 'checkbox'] else None,
+                                    'answer_text': subq_answer
+                                })
         
         # Update response with quiz score if this is a quiz
+        total_score = max_possible_score = 0
+        passed = None
         if form.is_quiz:
-            response.score = total_score
-            response.max_score = max_possible_score
-            # Check if the respondent passed the quiz based on passing percentage
-            if max_possible_score > 0:
-                score_percentage = (total_score / max_possible_score) * 100
-                response.passed = score_percentage >= form.passing_score
-            else:
-                response.passed = False
-        
-        # Commit all the answers and subquestion answers
-        db.session.commit()
+            total_score, max_possible_score, passed = score_quiz(form, answered_questions)
+            response_values.update(score=total_score, max_score=max_possible_score, passed=passed)
         
-        # Export the response as JSON
-        _, export_path = export_response_to_json(response, form)
+        # Insert the response, answers and subquestion answers in bulk and commit
+        response_id = save_submission(response_values, answer_rows, subquestion_answer_rows)
         
-        print(f"Response exported to JSON: {export_path}")
+        # Hand the response to the background export worker so the respondent doesn't wait on disk I/O
+        response_export_worker.enqueue(response_id)
         
         # Check if request is from an embedded iframe or AJAX request
         is_embedded = request.headers.get('X-Embedded') == 'true' or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
@@ -828,7 +2942,7 @@ def submit_form(form_id):
             'message': 'Thank you! Your response has been recorded.',
             'custom_thank_you': form.thank_you_message if hasattr(form, 'thank_you_message') and form.thank_you_message else None,
             'redirect_url': url_for('dashboard'),
-            'response_id': response.id
+            'response_id': response_id
         }
         
         # Add quiz results if this is a quiz and we should show the score
@@ -838,7 +2952,7 @@ def submit_form(form_id):
                 'score': total_score,
                 'max_score': max_possible_score,
                 'passing_score': form.passing_score,
-                'passed': response.passed,
+                'passed': passed,
                 'score_percentage': round((total_score / max_possible_score) * 100) if max_possible_score > 0 else 0
             })
         
@@ -849,7 +2963,7 @@ def submit_form(form_id):
         
         # Set flash message with quiz results if applicable
         if form.is_quiz and form.show_score:
-            if response.passed:
+            if passed:
                 flash(f'Congratulations! You passed the quiz with a score of {total_score}/{max_possible_score} ({response_data["score_percentage"]}%).', 'success')
             else:
                 flash(f'You scored {total_score}/{max_possible_score} ({response_data["score_percentage"]}%). The passing score is {form.passing_score}%.', 'warning')
@@ -857,7 +2971,7 @@ def submit_form(form_id):
             flash('Thank you! Your response has been recorded.', 'success')
             
         # Return standard page redirect for non-AJAX requests
-        return redirect(url_for('form_submitted', form_id=form_id, response_id=response.id))
+        return redirect(url_for('form_submitted', form_id=form_id, response_id=response_id))
         
     except Exception as e:
         db.session.rollback()
@@ -874,222 +2988,1187 @@ def submit_form(form_id):
         flash(f'Error submitting form: {str(e)}', 'danger')
         return redirect(url_for('view_form', form_id=form_id))
 
-# Add a success page route
-@app.route('/form/<int:form_id>/submitted')
-def form_submitted(form_id):
-    form = Form.query.get_or_404(form_id)
-    
-    # If response_id is in the URL, fetch it for displaying quiz results
-    response_id = request.args.get('response_id', type=int)
-    response = None
-    
-    if response_id:
-        response = Response.query.get(response_id)
-    
-    return render_template('form_submitted.html', form=form, response=response, now=datetime.now())
+# Add a success page route
+@app.route('/form/<int:form_id>/submitted')
+def form_submitted(form_id):
+    form = Form.query.get_or_404(form_id)
+    
+    # If response_id is in the URL, fetch it for displaying quiz results
+    response_id = request.args.get('response_id', type=int)
+    response = None
+    
+    if response_id:
+        response = Response.query.get(response_id)
+    
+    return render_template('form_submitted.html', form=form, response=response, now=datetime.now())
+
+@app.route('/form/<int:form_id>/responses')
+@login_required
+def view_responses(form_id):
+    form = get_form_schema(form_id)
+    if form.user_id != current_user.id:
+        flash('You do not have permission to view these responses')
+        return redirect(url_for('dashboard'))
+    
+    # Keyset pagination, newest first: ?before=<id> pages back, ?after=<id> pages forward
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
+    page_size = max(1, min(request.args.get('per_page', app.config['RESPONSES_PAGE_SIZE'], type=int), 500))
+    
+    responses, has_older, has_newer = load_response_page(form, before=before, after=after, page_size=page_size)
+    summary = load_response_summary(form_id)
+    
+    return render_template('view_responses.html', form=form, responses=responses, summary=summary,
+                           has_older=has_older, has_newer=has_newer, per_page=page_size)
+
+def load_response_summary(form_id):
+    """Compute the summary cards for a form's responses with a single aggregate query"""
+    total, total_score, total_max, passed_count, latest = db.session.query(
+        func.count(Response.id),
+        func.sum(Response.score),
+        func.sum(Response.max_score),
+        func.sum(case((Response.passed == True, 1), else_=0)),
+        func.max(Response.submitted_at)
+    ).filter(Response.form_id == form_id).one()
+    
+    return {
+        'total': total,
+        'average_score': round((total_score or 0) / total_max * 100) if total_max else 0,
+        'pass_rate': round((passed_count or 0) / total * 100) if total else 0,
+        'latest': latest
+    }
+
+CHOICE_QUESTION_TYPES = ('radio', 'multiple_choice', 'checkbox')
+
+class ResponseSummaryCache:
+    """Thread-safe LRU cache of response analytics keyed by form ID and a version tuple"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, form_id):
+        """Return (version, state, summary) of the last summary built for a form, or None"""
+        with self._lock:
+            entry = self._summaries.get(form_id)
+            if entry is not None:
+                self._summaries.move_to_end(form_id)
+            return entry
+
+    def put(self, form_id, version, state, summary):
+        with self._lock:
+            self._summaries[form_id] = (version, state, summary)
+            self._summaries.move_to_end(form_id)
+            while len(self._summaries) > self.maxsize:
+                self._summaries.popitem(last=False)
+
+    def invalidate(self, form_id):
+        with self._lock:
+            self._summaries.pop(form_id, None)
+
+response_summary_cache = ResponseSummaryCache(app.config['RESPONSE_SUMMARY_CACHE_SIZE'])
+
+def empty_response_summary_state():
+    return {
+        'last_response_id': 0,
+        'total': 0,
+        'utm_source': {},
+        'device_type': {},
+        'company': {},
+        'questions': {}
+    }
+
+def add_counts(counts, key, count):
+    counts[key] = counts.get(key, 0) + count
+
+def aggregate_responses_into(state, form_id, after_id, upto_id):
+    """Add the responses with after_id < id <= upto_id to the totals and breakdowns"""
+    rows = db.session.query(
+        Response.utm_source, Response.device_type, Response.company_id, func.count(Response.id)
+    ).filter(
+        Response.form_id == form_id,
+        Response.id > after_id,
+        Response.id <= upto_id
+    ).group_by(Response.utm_source, Response.device_type, Response.company_id)
+    for utm_source, device_type, company_id, count in rows:
+        state['total'] += count
+        add_counts(state['utm_source'], utm_source or 'none', count)
+        add_counts(state['device_type'], device_type or 'unknown', count)
+        # JSON object keys are strings
+        add_counts(state['company'], str(company_id) if company_id is not None else 'none', count)
+
+def aggregate_answers_into(state, question_kinds, answer_filter, by_question=True):
+    """
+    Add grouped answer counts of the given questions to the state
+    
+    Only answers to choice questions are grouped by value, free text would make every
+    answer its own group. Checkbox answers are ', '-joined selections and are split
+    here, once per distinct combination rather than per answer.
+    
+    Args:
+        question_kinds: {question_id: question_type}
+        answer_filter: Filter on Answer, e.g. the new responses
+        by_question: Also filter on the question IDs. Leave it off when answer_filter
+            is selective on its own, otherwise the question_id index is scanned instead
+    """
+    if not question_kinds:
+        return
+    choice_ids = [qid for qid, question_type in question_kinds.items() if question_type in CHOICE_QUESTION_TYPES]
+    if choice_ids:
+        value = case((Answer.question_id.in_(choice_ids), Answer.answer_text), else_=None).label('answer_value')
+        group_by = (Answer.question_id, literal_column('answer_value'))
+    else:
+        value = literal_column('NULL')
+        group_by = (Answer.question_id,)
+    rows = db.session.query(
+        Answer.question_id, value, func.count(Answer.id)
+    ).filter(answer_filter)
+    if by_question:
+        rows = rows.filter(Answer.question_id.in_(list(question_kinds)))
+    
+    for question_id, answer_text, count in rows.group_by(*group_by):
+        if question_id not in question_kinds:
+            continue
+        question = state['questions'][str(question_id)]
+        question['answered'] += count
+        if answer_text is None or not question['choice']:
+            continue
+        selections = answer_text.split(', ') if question_kinds[question_id] == 'checkbox' else [answer_text]
+        for selection in selections:
+            add_counts(question['values'], selection, count)
+
+def refresh_response_summary_state(form, state, response_count, latest_id, rebuilding=False):
+    """
+    Bring a summary state up to date with the form's responses and questions
+    
+    Responses newer than the state are aggregated and added to it. Questions that
+    were added or changed between free text and choices since the state was built
+    are aggregated on their own over the responses already in it. If the response
+    count doesn't add up afterwards (responses were deleted or committed out of ID
+    order) the state is rebuilt from scratch.
+    
+    Returns:
+        dict: The updated state, a copy of the one passed in
+    """
+    state = copy.deepcopy(state)
+    last_id = state['last_response_id']
+    kinds = {question.id: question.question_type for question in form.questions}
+    
+    # Questions the state doesn't cover for the responses it already holds
+    questions = state['questions']
+    for key in list(questions):
+        if int(key) not in kinds:
+            del questions[key]
+    stale = {}
+    for question_id, question_type in kinds.items():
+        question = questions.get(str(question_id))
+        if question is None or question['type'] != question_type:
+            questions[str(question_id)] = {
+                'type': question_type,
+                'choice': question_type in CHOICE_QUESTION_TYPES,
+                'answered': 0,
+                'values': {}
+            }
+            stale[question_id] = question_type
+    if stale and last_id:
+        aggregate_answers_into(state, stale, Answer.response_id <= last_id)
+    
+    if latest_id > last_id:
+        aggregate_responses_into(state, form.id, last_id, latest_id)
+        if last_id:
+            new_responses = select(Response.id).where(
+                Response.form_id == form.id,
+                Response.id > last_id,
+                Response.id <= latest_id
+            )
+            aggregate_answers_into(state, kinds, Answer.response_id.in_(new_responses), by_question=False)
+        else:
+            aggregate_answers_into(state, kinds, Answer.response_id <= latest_id)
+        state['last_response_id'] = latest_id
+    
+    if state['total'] != response_count and not rebuilding:
+        return refresh_response_summary_state(form, empty_response_summary_state(), response_count, latest_id,
+                                              rebuilding=True)
+    return state
+
+def render_response_summary(form, state):
+    """Turn a summary state into the analytics returned by the summary endpoint"""
+    total = state['total']
+    
+    company_ids = [int(key) for key in state['company'] if key != 'none']
+    company_names = dict(db.session.query(Company.id, Company.name).filter(Company.id.in_(company_ids))) if company_ids else {}
+    companies = sorted((
+        {
+            'company_id': int(key) if key != 'none' else None,
+            'name': company_names.get(int(key)) if key != 'none' else None,
+            'count': count
+        }
+        for key, count in state['company'].items()
+    ), key=lambda company: -company['count'])
+    
+    questions = []
+    for question in form.questions:
+        counts = state['questions'].get(str(question.id), {'answered': 0, 'values': {}})
+        summary = {
+            'id': question.id,
+            'text': question.question_text,
+            'type': question.question_type,
+            'answered': counts['answered'],
+            'fill_rate': round(counts['answered'] / total, 4) if total else 0.0
+        }
+        if question.question_type in CHOICE_QUESTION_TYPES:
+            # Every current option is listed, answers no longer among the options too
+            options = {
+                option if isinstance(option, str) else option.get('text', ''): 0
+                for option in question.parsed_options
+            }
+            for value, count in counts['values'].items():
+                options[value] = options.get(value, 0) + count
+            summary['options'] = options
+        questions.append(summary)
+    
+    return {
+        'form_id': form.id,
+        'total_responses': total,
+        'breakdowns': {
+            'utm_source': state['utm_source'],
+            'device_type': state['device_type'],
+            'company': companies
+        },
+        'questions': questions
+    }
+
+def get_response_analytics(form):
+    """
+    Return the response analytics of a form, aggregating only what changed
+    
+    The running totals are kept in the response_summary table and in memory, keyed
+    on the newest response ID they include. A request costs one indexed
+    count/max over the form's responses, plus aggregating the responses submitted
+    since the last summary, so large forms are never rescanned.
+    
+    Args:
+        form: The FormSchema of the form
+    """
+    response_count, latest_id = db.session.query(
+        func.count(Response.id), func.max(Response.id)
+    ).filter(Response.form_id == form.id).one()
+    latest_id = latest_id or 0
+    version = (form.version, response_count, latest_id)
+    
+    cached = response_summary_cache.get(form.id)
+    if cached is not None and cached[0] == version:
+        return cached[2]
+    
+    if cached is not None:
+        state = cached[1]
+    else:
+        row = db.session.get(ResponseSummary, form.id)
+        state = json_loads(row.state) if row is not None else empty_response_summary_state()
+    
+    new_state = refresh_response_summary_state(form, state, response_count, latest_id)
+    if new_state != state:
+        save_response_summary_state(form.id, new_state)
+    
+    summary = render_response_summary(form, new_state)
+    response_summary_cache.put(form.id, version, new_state, summary)
+    return summary
+
+def save_response_summary_state(form_id, state):
+    """Store a form's summary state, the row is replaced as a whole so concurrent refreshes can't double count"""
+    values = {
+        'form_id': form_id,
+        'last_response_id': state['last_response_id'],
+        'response_count': state['total'],
+        'state': json_dumps(state),
+        'updated_at': datetime.utcnow()
+    }
+    try:
+        updated = db.session.query(ResponseSummary).filter_by(form_id=form_id).update(
+            values, synchronize_session=False
+        )
+        if not updated:
+            db.session.execute(insert(ResponseSummary.__table__).values(**values))
+        db.session.commit()
+    except IntegrityError:
+        # Another worker stored its summary first, ours is rebuilt from it next time
+        db.session.rollback()
+
+def load_response_page(form, before=None, after=None, page_size=50):
+    """
+    Load one page of a form's responses with their answers pivoted by question
+    
+    A subquery picks the page of response IDs using the (form_id, id) keyset, then a
+    single grouped query joins the company and answers and turns each question's
+    answer into its own column.
+    
+    Returns:
+        list: One dict per response, newest first, with answers keyed by question ID
+        bool: Whether older responses exist
+        bool: Whether newer responses exist
+    """
+    page_query = db.session.query(Response.id).filter(Response.form_id == form.id)
+    if after is not None:
+        page_query = page_query.filter(Response.id > after).order_by(Response.id.asc())
+    else:
+        if before is not None:
+            page_query = page_query.filter(Response.id < before)
+        page_query = page_query.order_by(Response.id.desc())
+    page_ids = [row.id for row in page_query.limit(page_size + 1)]
+    
+    has_more = len(page_ids) > page_size
+    page_ids = sorted(page_ids[:page_size], reverse=True)
+    if after is not None:
+        has_older, has_newer = bool(page_ids), has_more
+    else:
+        has_older, has_newer = has_more, before is not None
+    if not page_ids:
+        return [], has_older, has_newer
+    
+    answer_columns = [
+        func.min(case((Answer.question_id == question.id, Answer.answer_text))).label(f'q_{question.id}')
+        for question in form.questions
+    ]
+    rows = db.session.query(
+        Response.id,
+        Response.submitted_at,
+        Response.score,
+        Response.max_score,
+        Response.passed,
+        Company.name.label('company_name'),
+        *answer_columns
+    ).outerjoin(
+        Company, Company.id == Response.company_id
+    ).outerjoin(
+        Answer, Answer.response_id == Response.id
+    ).filter(
+        Response.id.in_(page_ids)
+    ).group_by(
+        Response.id, Company.id, Company.name
+    ).order_by(Response.id.desc()).all()
+    
+    responses = []
+    for row in rows:
+        mapping = row._mapping
+        responses.append({
+            'id': row.id,
+            'submitted_at': row.submitted_at,
+            'score': row.score,
+            'max_score': row.max_score,
+            'passed': row.passed,
+            'company_name': row.company_name,
+            'answers': {question.id: mapping[f'q_{question.id}'] for question in form.questions}
+        })
+    
+    return responses, has_older, has_newer
+
+@app.route('/form/<int:form_id>/responses/export-json')
+@login_required
+def export_responses_json(form_id):
+    form = get_form_schema(form_id)
+    if form.user_id != current_user.id:
+        flash('You do not have permission to export these responses')
+        return redirect(url_for('dashboard'))
+    
+    # Create filename with form ID and timestamp
+    timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    filename = f"all_responses_form_{form_id}_{timestamp}.json"
+    
+    # Stream the JSON array as it is built so memory stays flat for large forms,
+    # ?compact=1 drops the indentation
+    body = iter_json_array(
+        iter_form_response_exports(form, app.config['EXPORT_STREAM_BATCH_SIZE']),
+        indent=None if request.args.get('compact') == '1' else 2
+    )
+    headers = {
+        'Content-Disposition': f'attachment; filename={filename}',
+        'Vary': 'Accept-Encoding'
+    }
+    encoding = negotiate_export_encoding()
+    if encoding:
+        body = iter_compressed(body, encoding)
+        headers['Content-Encoding'] = encoding
+    return app.response_class(stream_with_context(body), mimetype='application/json', headers=headers)
+
+@app.route('/form/<int:form_id>/responses/summary')
+@login_required
+def response_summary(form_id):
+    """Per-question answer counts, fill rates and response breakdowns of a form as JSON"""
+    form = get_form_schema(form_id)
+    if form.user_id != current_user.id:
+        abort(404)
+    return jsonify(get_response_analytics(form))
+
+@app.route('/form/<int:form_id>/delete', methods=['POST'])
+@login_required
+def delete_form(form_id):
+    try:
+        # Get the form and verify ownership
+        form = Form.query.get_or_404(form_id)
+        if form.user_id != current_user.id:
+            flash('You do not have permission to delete this form', 'danger')
+            return redirect(url_for('dashboard'))
+
+        # Check for _method parameter to confirm deletion intent
+        _method = request.form.get('_method')
+        if _method != 'DELETE':
+            flash('Invalid deletion request', 'danger')
+            return redirect(url_for('dashboard'))
+
+        ResponseSummary.query.filter_by(form_id=form.id).delete(synchronize_session=False)
+        
+        # Drop the PDF extraction jobs that generated this form
+        PDFExtractionJob.query.filter_by(form_id=form.id).delete(synchronize_session=False)
+
+        # Delete associated files, uploads are stored by content so other uploads may share the file
+        for pdf_upload in form.pdf_upload:
+            shared = PDFUpload.query.filter(
+                PDFUpload.filename == pdf_upload.filename,
+                PDFUpload.id != pdf_upload.id
+            ).count()
+            pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], pdf_upload.filename)
+            if not shared and os.path.exists(pdf_path):
+                os.remove(pdf_path)
+            PDFExtractionJob.query.filter_by(pdf_upload_id=pdf_upload.id).delete(synchronize_session=False)
+            db.session.delete(pdf_upload)
+
+        # Delete exported response files, only this form's bucket is touched
+        shutil.rmtree(response_export_form_dir(form.id), ignore_errors=True)
+        response_export_bundles.invalidate(form.id)
+        shutil.rmtree(response_snapshot_path(form.id), ignore_errors=True)
+
+        # Delete the form (this will cascade delete questions, responses, etc.)
+        db.session.delete(form)
+        db.session.commit()
+        form_schema_cache.invalidate(form_id)
+        tracking_cache.invalidate_form(form_id)
+        response_summary_cache.invalidate(form_id)
+
+        flash('Form deleted successfully', 'success')
+        return redirect(url_for('dashboard'))
+
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error deleting form: {str(e)}', 'danger')
+        return redirect(url_for('dashboard'))
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
+
+# Bump when the PDF or mindmap parser output changes, so cached results are not reused
+PDF_PARSER_VERSION = 2
+MINDMAP_PARSER_VERSION = 1
+
+# Option markers recognised in text extracted from PDFs
+PDF_CHOICE_MARKER_RE = re.compile(r'\([a-dA-D]\)')  # (a) .. (d), (A) .. (D)
+PDF_CHECKBOX_MARKER_RE = re.compile(r'\[ {1,2}\]|□')  # [ ], [  ] or □
+NON_LETTER_RE = re.compile(r'[^\w ]|[\d_]')
+
+def clean_text(text):
+    """Keep only letters and spaces, collapsing runs of whitespace"""
+    text = NON_LETTER_RE.sub('', text)
+    # \w also matches numeric characters such as '²', drop those one character at a time
+    if not text.isascii():
+        letters = text.replace(' ', '')
+        if letters and not letters.isalpha():
+            text = ''.join(c for c in text if c.isalpha() or c == ' ')
+    return ' '.join(text.split())
+
+def iter_questions_from_lines(lines):
+    """
+    Parse questions out of a stream of lines extracted from a PDF
+    
+    Lines are consumed one at a time with a single line of lookahead, so the input
+    can be a generator spanning many pages and a question whose options continue on
+    the next page is kept together. Each line is stripped and checked for choice and
+    checkbox markers once:
+    - a line with a choice marker starts a multiple choice question and the
+      following lines with choice markers are its options
+    - otherwise a line with a checkbox marker starts a checkbox question and the
+      following lines with checkbox markers are its options
+    - otherwise a line ending in '?' is a text question ('*' marks it required),
+      or a multiple choice question if the next lines carry choice markers
+    Lines with an underline never produce a question, clean_text() drops the '?'
+    the old check looked for.
+    
+    Yields:
+        dict: Question with text, type, required and (for choice questions) options
+    """
+    has_choice_marker = PDF_CHOICE_MARKER_RE.search
+    has_checkbox_marker = PDF_CHECKBOX_MARKER_RE.search
+    classified = (
+        (line, has_choice_marker(line) is not None, has_checkbox_marker(line) is not None)
+        for line in map(str.strip, lines)
+    )
+    
+    current = next(classified, None)
+    while current is not None:
+        following = next(classified, None)
+        line, is_choice, is_checkbox = current
+        
+        if not line:
+            pass
+        
+        elif is_choice or (line.endswith('?') and '_' not in line and not is_checkbox
+                           and following is not None and following[1]):
+            # A question line followed by choice options, or an option line opening a question
+            if is_choice:
+                question_text = clean_text(line)
+                required = True
+            else:
+                question_text = clean_text(line.replace('*', ''))
+                required = '*' in line
+            
+            options = []
+            while following is not None and following[1]:
+                # Remove option markers and clean text
+                option_text = following[0]
+                if ')' in option_text:
+                    option_text = option_text.split(')', 1)[1]
+                options.append(clean_text(option_text))
+                following = next(classified, None)
+            
+            yield {
+                'text': question_text,
+                'type': 'multiple_choice',
+                'options': options,
+                'required': required
+            }
+        
+        elif is_checkbox:
+            question_text = clean_text(line)
+            options = []
+            while following is not None and following[2]:
+                # Remove checkbox markers and clean text
+                option_text = following[0].replace('[ ]', '').replace('[  ]', '').replace('□', '')
+                options.append(clean_text(option_text))
+                following = next(classified, None)
+            
+            yield {
+                'text': question_text,
+                'type': 'checkbox',
+                'options': options,
+                'required': True
+            }
+        
+        elif '_' not in line and line.endswith('?'):
+            yield {
+                'text': clean_text(line.replace('*', '')),
+                'type': 'text',
+                'required': '*' in line
+            }
+        
+        current = following
+
+def iter_page_lines(page_texts):
+    """
+    Yield the lines of consecutive page texts as one stream
+    
+    Blank lines at the top and bottom of a page are dropped, so a question at the
+    end of one page still sees its options at the start of the next.
+    """
+    for text in page_texts:
+        text = text.strip()
+        if text:
+            yield from text.split('\n')
+
+def parse_questions_from_text(text):
+    """Parse the questions out of a block of extracted PDF text"""
+    return list(iter_questions_from_lines(text.split('\n')))
+
+def parse_questions_from_pages(page_texts):
+    """Parse the questions of consecutive pages, questions may continue across a page break"""
+    return list(iter_questions_from_lines(iter_page_lines(page_texts)))
+
+def iter_pdf_page_texts(pdf_path, start=0, stop=None, max_chars=None):
+    """
+    Yield the text of the pages [start, stop) of a PDF one page at a time
+    
+    Args:
+        pdf_path: Path of the PDF file
+        start: First page index
+        stop: Page index to stop before, defaults to the end of the document
+        max_chars: Truncate each page's text to this many characters
+    """
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        page_count = len(reader.pages)
+        stop = page_count if stop is None else min(stop, page_count)
+        for index in range(start, stop):
+            text = reader.pages[index].extract_text() or ''
+            yield text[:max_chars] if max_chars else text
+
+def extract_questions_from_pdf(pdf_path):
+    questions = []
+    try:
+        page_texts = iter_pdf_page_texts(
+            pdf_path,
+            stop=app.config['PDF_MAX_PAGES'],
+            max_chars=app.config['PDF_MAX_PAGE_CHARS']
+        )
+        questions = list(islice(
+            iter_questions_from_lines(iter_page_lines(page_texts)),
+            app.config['PDF_MAX_QUESTIONS']
+        ))
+    except Exception as e:
+        flash(f'Error processing PDF: {str(e)}')
+    return questions
+
+def count_pdf_pages(pdf_path):
+    """Return the number of pages of a PDF, runs in the PDF extraction process pool"""
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def extract_pdf_page_texts(pdf_path, start, stop, max_chars=None):
+    """
+    Extract the text of pages [start, stop) of a PDF
+    
+    Runs in the PDF extraction process pool, so it only touches the file.
+    """
+    return list(iter_pdf_page_texts(pdf_path, start, stop, max_chars))
+
+def pdf_parser_version():
+    """Cache key for PDF parser output, the budgets change what a PDF parses to"""
+    return (f"v{PDF_PARSER_VERSION}-p{app.config['PDF_MAX_PAGES']}"
+            f"-c{app.config['PDF_MAX_PAGE_CHARS']}-q{app.config['PDF_MAX_QUESTIONS']}")
+
+def mindmap_parser_version():
+    return f"v{MINDMAP_PARSER_VERSION}"
+
+class ParsedDocumentCache:
+    """
+    Parser output keyed by the SHA-256 of the parsed input
+
+    Results are stored in the parsed_document table, shared by every process, and
+    mirrored as JSON files under PARSE_CACHE_FOLDER so repeated hits don't go to the
+    database. Entries are also keyed on the parser version, so a parser change never
+    reuses stale results. Hit and miss counters are kept per process.
+
+    The files are pruned least recently used first once they take more than
+    `max_bytes`; pruned entries are still found in the database.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _path(self, kind, content_hash, parser_version):
+        return os.path.join(self.folder, kind, f'{content_hash}.{parser_version}.json')
+
+    def _count(self, kind, outcome):
+        with self._lock:
+            counters = self._stats.setdefault(kind, {'disk_hits': 0, 'db_hits': 0, 'misses': 0})
+            counters[outcome] += 1
+
+    def _write_file(self, path, payload):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def get(self, kind, content_hash, parser_version):
+        """Return the cached result, or None if this input has not been parsed yet"""
+        path = self._path(kind, content_hash, parser_version)
+        try:
+            with open(path, 'rb') as f:
+                result = json_loads(f.read())
+            # The modification time orders files for pruning
+            os.utime(path)
+            self._count(kind, 'disk_hits')
+            return result
+        except (OSError, ValueError):
+            pass
+
+        row = db.session.query(ParsedDocument.result).filter_by(
+            kind=kind, content_hash=content_hash, parser_version=parser_version
+        ).first()
+        if row is None:
+            self._count(kind, 'misses')
+            return None
+
+        self._write_file(path, row.result)
+        self._count(kind, 'db_hits')
+        return json_loads(row.result)
+
+    def put(self, kind, content_hash, parser_version, result):
+        """Store a parser result in the current transaction, the caller commits"""
+        payload = json_dumps(result)
+        try:
+            with db.session.begin_nested():
+                db.session.add(ParsedDocument(
+                    kind=kind, content_hash=content_hash, parser_version=parser_version, result=payload
+                ))
+        except IntegrityError:
+            # Another process parsed the same input first, only the savepoint is rolled back
+            pass
+        self._write_file(self._path(kind, content_hash, parser_version), payload)
+        self.prune()
+
+    def prune(self):
+        """Delete the least recently used cache files until they fit in max_bytes, returns the number deleted"""
+        files = []
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        deleted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                deleted += 1
+            except OSError:
+                # Pruned by another process
+                pass
+            total -= size
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            stats = {kind: dict(counters) for kind, counters in self._stats.items()}
+        for counters in stats.values():
+            lookups = counters['disk_hits'] + counters['db_hits'] + counters['misses']
+            counters['hit_ratio'] = round((lookups - counters['misses']) / lookups, 3) if lookups else None
+        return stats
+
+parsed_document_cache = ParsedDocumentCache(app.config['PARSE_CACHE_FOLDER'], app.config['PARSE_CACHE_MAX_BYTES'])
+
+def store_upload_by_hash(file, folder, extension):
+    """
+    Save an uploaded file under the SHA-256 of its content
+
+    Identical uploads end up in the same file, so each distinct file is stored once.
+
+    Returns:
+        tuple: (content hash, stored filename)
+    """
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(folder, f'.upload-{uuid.uuid4().hex}')
+    with open(tmp_path, 'wb') as out:
+        for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+            out.write(chunk)
+
+    content_hash = digest.hexdigest()
+    filename = f'{content_hash}.{extension}'
+    path = os.path.join(folder, filename)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+    return content_hash, filename
+
+def create_form_from_pdf_questions(pdf_upload, questions, user_id, company_id, max_questions):
+    """
+    Create the form for parsed PDF questions and link the upload to it, the caller commits
+
+    Returns:
+        tuple: (form, warning) where warning is set if questions were cut at max_questions
+    """
+    warning = None
+    if len(questions) > max_questions:
+        questions = questions[:max_questions]
+        warning = f'Only the first {max_questions} questions were imported'
+
+    form = Form(
+        title=f"Form from {pdf_upload.original_filename}",
+        description="Automatically generated from PDF",
+        user_id=user_id,
+        company_id=company_id
+    )
+    db.session.add(form)
+    db.session.flush()
+
+    # Update PDF upload with form ID
+    pdf_upload.form_id = form.id
+
+    db.session.execute(insert(Question.__table__), [
+        {
+            'form_id': form.id,
+            'question_text': q['text'],
+            'question_type': q['type'],
+            'options': json_dumps(q['options']) if 'options' in q else None,
+            'required': q['required'],
+            'order': i
+        }
+        for i, q in enumerate(questions)
+    ])
+
+    return form, warning
+
+class PDFExtractionWorker:
+    """
+    Background thread that turns uploaded PDFs into forms
+
+    upload_pdf only stores the file and a queued PDFExtractionJob. The worker
+    claims jobs one at a time, extracts their pages in chunks across a process
+    pool, records progress on the job row and finally creates the form. Jobs are
+    persisted, so queued jobs and running jobs that stopped reporting progress
+    (e.g. the process died) are picked up again when a worker starts.
+
+    Pages are streamed through the question parser in page order with only a few
+    chunks in flight, so neither the web process nor the pool holds a whole large
+    PDF's text. The page, page text and question budgets bound the work per job.
+    """
+
+    def __init__(self, processes, chunk_pages, stale_seconds, max_tasks_per_child,
+                 max_pages, max_page_chars, max_questions):
+        self.processes = processes
+        self.chunk_pages = chunk_pages
+        self.stale_seconds = stale_seconds
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_pages = max_pages
+        self.max_page_chars = max_page_chars
+        self.max_questions = max_questions
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread if it is not running yet"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pdf-extraction-worker', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, job_id):
+        self.start()
+        self._queue.put(job_id)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get_pool(self):
+        if self._pool is None:
+            # Spawned rather than forked, the web process has threads and open connections
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                max_tasks_per_child=self.max_tasks_per_child
+            )
+        return self._pool
+
+    def _run(self):
+        with app.app_context():
+            try:
+                for job_id in self.pending_job_ids():
+                    self._queue.put(job_id)
+            except Exception as e:
+                print(f"Error recovering PDF extraction jobs: {str(e)}")
+            finally:
+                db.session.remove()
+
+        while True:
+            job_id = self._queue.get()
+            with app.app_context():
+                try:
+                    self.run_job(job_id)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error extracting PDF for job {job_id}: {str(e)}")
+                    try:
+                        self.finish(job_id, 'failed', error=f'Error processing PDF: {str(e)}')
+                    except Exception:
+                        db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def pending_job_ids(self):
+        """Requeue stale running jobs and return the IDs of every queued job"""
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        PDFExtractionJob.query.filter(
+            PDFExtractionJob.status == 'running',
+            PDFExtractionJob.updated_at < stale_before
+        ).update({PDFExtractionJob.status: 'queued'}, synchronize_session=False)
+        db.session.commit()
+        return [row.id for row in db.session.query(PDFExtractionJob.id).filter(
+            PDFExtractionJob.status == 'queued'
+        ).order_by(PDFExtractionJob.id)]
+
+    def claim(self, job_id):
+        """Mark a queued job as running, returns False if another worker got it first"""
+        claimed = PDFExtractionJob.query.filter_by(id=job_id, status='queued').update({
+            PDFExtractionJob.status: 'running',
+            PDFExtractionJob.pages_done: 0,
+            PDFExtractionJob.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def finish(self, job_id, status, form_id=None, error=None):
+        PDFExtractionJob.query.filter_by(id=job_id).update({
+            PDFExtractionJob.status: status,
+            PDFExtractionJob.form_id: form_id,
+            PDFExtractionJob.error: error,
+            PDFExtractionJob.updated_at: datetime.utcnow(),
+            PDFExtractionJob.finished_at: datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+
+    def run_job(self, job_id):
+        if not self.claim(job_id):
+            return
+
+        job = db.session.get(PDFExtractionJob, job_id)
+        pdf_upload = db.session.get(PDFUpload, job.pdf_upload_id)
+        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], pdf_upload.filename)
+
+        try:
+            page_count = self._get_pool().submit(count_pdf_pages, pdf_path).result()
+            job.pages_total = page_count
+            db.session.commit()
+            if page_count > self.max_pages:
+                self.finish(job_id, 'failed',
+                            error=f'The PDF has {page_count} pages, at most {self.max_pages} can be converted')
+                return
+
+            # Stops extracting pages as soon as the question budget is used up
+            questions = list(islice(
+                iter_questions_from_lines(iter_page_lines(self.iter_pages(job, pdf_path, page_count))),
+                self.max_questions + 1
+            ))
+        except BrokenProcessPool:
+            # A page crashed its process, start with a fresh pool for the next job
+            self._pool = None
+            raise
+
+        if pdf_upload.content_hash:
+            parsed_document_cache.put('pdf', pdf_upload.content_hash, pdf_parser_version(), questions)
+
+        if not questions:
+            self.finish(job_id, 'failed', error='No questions found in the PDF')
+            return
+
+        form, warning = create_form_from_pdf_questions(
+            pdf_upload, questions, job.user_id, job.company_id, self.max_questions
+        )
+        db.session.commit()
+
+        self.finish(job_id, 'done', form_id=form.id, error=warning)
+
+    def iter_pages(self, job, pdf_path, page_count):
+        """
+        Yield page texts in page order while the pool extracts the chunks ahead
+
+        At most two chunks per process are in flight, so memory stays bounded no
+        matter how long the PDF is. Progress is recorded on the job per chunk.
+        """
+        pool = self._get_pool()
+        starts = iter(range(0, page_count, self.chunk_pages))
+        pending = OrderedDict()
+
+        def submit_next():
+            start = next(starts, None)
+            if start is not None:
+                stop = min(start + self.chunk_pages, page_count)
+                pending[start] = pool.submit(extract_pdf_page_texts, pdf_path, start, stop, self.max_page_chars)
+
+        for _ in range(self.processes * 2):
+            submit_next()
+
+        try:
+            while pending:
+                _, future = pending.popitem(last=False)
+                page_texts = future.result()
+                submit_next()
+
+                job.pages_done += len(page_texts)
+                job.updated_at = datetime.utcnow()
+                db.session.commit()
 
-@app.route('/form/<int:form_id>/responses')
-@login_required
-def view_responses(form_id):
-    form = Form.query.get_or_404(form_id)
-    if form.user_id != current_user.id:
-        flash('You do not have permission to view these responses')
-        return redirect(url_for('dashboard'))
-    
-    responses = Response.query.filter_by(form_id=form_id).all()
-    return render_template('view_responses.html', form=form, responses=responses)
+                yield from page_texts
+        finally:
+            # The parser may stop early once it has enough questions
+            for future in pending.values():
+                future.cancel()
 
-@app.route('/form/<int:form_id>/responses/export-json')
-@login_required
-def export_responses_json(form_id):
-    form = Form.query.get_or_404(form_id)
-    if form.user_id != current_user.id:
-        flash('You do not have permission to export these responses')
-        return redirect(url_for('dashboard'))
-    
-    responses = Response.query.filter_by(form_id=form_id).all()
-    
-    # Create a list to hold all responses
-    all_responses = []
-    
-    for response in responses:
-        # Use the helper function to export each response
-        response_data, _ = export_response_to_json(response, form)
-        all_responses.append(response_data)
-    
-    # Create export directory if it doesn't exist
-    export_path = os.path.join('exports', 'survey_responses')
-    os.makedirs(export_path, exist_ok=True)
-    
-    # Create filename with form ID and timestamp
-    timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-    filename = f"all_responses_form_{form_id}_{timestamp}.json"
-    file_path = os.path.join(export_path, filename)
-    
-    # Write all responses to JSON file
-    with open(file_path, 'w') as json_file:
-        json.dump(all_responses, json_file, indent=2)
-    
-    # Return the file as a download
-    return send_file(file_path, as_attachment=True, download_name=filename)
+pdf_extraction_worker = PDFExtractionWorker(
+    app.config['PDF_EXTRACTION_PROCESSES'],
+    app.config['PDF_EXTRACTION_CHUNK_PAGES'],
+    app.config['PDF_EXTRACTION_STALE_SECONDS'],
+    app.config['PDF_EXTRACTION_MAX_TASKS_PER_CHILD'],
+    app.config['PDF_MAX_PAGES'],
+    app.config['PDF_MAX_PAGE_CHARS'],
+    app.config['PDF_MAX_QUESTIONS']
+)
+atexit.register(pdf_extraction_worker.close)
 
-@app.route('/form/<int:form_id>/delete', methods=['POST'])
-@login_required
-def delete_form(form_id):
+# Columns compared when diffing the editor payload against stored rows
+QUESTION_COLUMNS = (
+    Question.id, Question.form_id, Question.question_text, Question.question_type, Question.options,
+    Question.required, Question.order, Question.is_quiz_question, Question.correct_answer,
+    Question.points, Question.feedback
+)
+SUBQUESTION_COLUMNS = (
+    SubQuestion.id, SubQuestion.question_id, SubQuestion.parent_option, SubQuestion.question_text,
+    SubQuestion.question_type, SubQuestion.options, SubQuestion.required, SubQuestion.order,
+    SubQuestion.nesting_level
+)
+
+def parse_question_id(value):
+    """Return the question ID sent by the editor (a data attribute string), or None for new questions"""
     try:
-        # Get the form and verify ownership
-        form = Form.query.get_or_404(form_id)
-        if form.user_id != current_user.id:
-            flash('You do not have permission to delete this form', 'danger')
-            return redirect(url_for('dashboard'))
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
-        # Check for _method parameter to confirm deletion intent
-        _method = request.form.get('_method')
-        if _method != 'DELETE':
-            flash('Invalid deletion request', 'danger')
-            return redirect(url_for('dashboard'))
+def build_question_rows(q_data, form_id, order):
+    """
+    Turn one question of the editor payload into table rows
 
-        # Delete associated files
-        if hasattr(form, 'pdf_upload') and form.pdf_upload:
-            pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], form.pdf_upload.filename)
-            if os.path.exists(pdf_path):
-                os.remove(pdf_path)
-            db.session.delete(form.pdf_upload)
+    Returns:
+        tuple: (question row, [subquestion row, ...]) where subquestion rows have no question_id yet
+    """
+    question_type = q_data['question_type']
+    row = {
+        'form_id': form_id,
+        'question_text': q_data['question_text'],
+        'question_type': question_type,
+        'options': None,
+        'required': q_data.get('required', False),
+        'order': order,
+        # Quiz-related fields
+        'is_quiz_question': q_data.get('is_quiz_question', False),
+        'correct_answer': q_data.get('correct_answer', None),
+        'points': int(q_data.get('points') or 0),
+        'feedback': q_data.get('feedback', None)
+    }
 
-        # Delete exported response files
-        export_path = os.path.join('exports', 'survey_responses')
-        if os.path.exists(export_path):
-            for file in os.listdir(export_path):
-                if file.startswith(f'response_{form.id}_'):
-                    os.remove(os.path.join(export_path, file))
+    # Only choice-based questions carry options and subquestions
+    if question_type not in ['radio', 'multiple_choice', 'checkbox']:
+        return row, []
 
-        # Delete the form (this will cascade delete questions, responses, etc.)
-        db.session.delete(form)
-        db.session.commit()
+    options_data = q_data.get('options', [])
 
-        flash('Form deleted successfully', 'success')
-        return redirect(url_for('dashboard'))
+    # If options is a string, try to parse it
+    if isinstance(options_data, str):
+        try:
+            options_data = json_loads(options_data)
+        except:
+            options_data = []
 
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error deleting form: {str(e)}', 'danger')
-        return redirect(url_for('dashboard'))
+    row['options'] = json_dumps(options_data)
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
+    subquestion_rows = []
+    for option_data in options_data or []:
+        # Simple option strings have no subquestions
+        if not isinstance(option_data, dict):
+            continue
+        option_text = option_data.get('text', '')
 
-def extract_questions_from_pdf(pdf_path):
-    questions = []
-    try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text = page.extract_text()
-                lines = text.split('\n')
-                i = 0
-                while i < len(lines):
-                    line = lines[i].strip()
-                    next_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
-                    
-                    # Skip empty lines
-                    if not line:
-                        i += 1
-                        continue
-                    
-                    # Function to clean text - only keep alphabets and spaces
-                    def clean_text(text):
-                        # Keep only alphabets and spaces
-                        text = ''.join(c for c in text if c.isalpha() or c == ' ')
-                        # Remove extra spaces
-                        text = ' '.join(text.split())
-                        return text
-                    
-                    # Check for multiple choice questions
-                    if any(option in line for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
-                        question_text = clean_text(line)
-                        options = []
-                        while i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
-                            i += 1
-                            option_text = lines[i].strip()
-                            # Remove option markers and clean text
-                            option_text = option_text.split(')', 1)[1].strip() if ')' in option_text else option_text
-                            option_text = clean_text(option_text)
-                            options.append(option_text)
-                        
-                        questions.append({
-                            'text': question_text,
-                            'type': 'multiple_choice',
-                            'options': options,
-                            'required': True
-                        })
-                    
-                    # Check for checkbox questions
-                    elif any(checkbox in line for checkbox in ['[ ]', '[  ]', '□']):
-                        question_text = clean_text(line)
-                        options = []
-                        while i + 1 < len(lines) and any(checkbox in lines[i + 1] for checkbox in ['[ ]', '[  ]', '□']):
-                            i += 1
-                            option_text = lines[i].strip()
-                            # Remove checkbox markers and clean text
-                            option_text = option_text.replace('[ ]', '').replace('[  ]', '').replace('□', '').strip()
-                            option_text = clean_text(option_text)
-                            options.append(option_text)
-                        
-                        questions.append({
-                            'text': question_text,
-                            'type': 'checkbox',
-                            'options': options,
-                            'required': True
-                        })
-                    
-                    # Check for text input questions (with underline)
-                    elif '_' in line or '___' in line:
-                        # Extract the question part before the underline
-                        question_text = line.split('_')[0].strip()
-                        question_text = clean_text(question_text)
-                        if question_text.endswith('?'):
-                            questions.append({
-                                'text': question_text,
-                                'type': 'text',
-                                'required': True
-                            })
-                    
-                    # Check for regular questions
-                    elif line.endswith('?'):
-                        # Check if it's a required question (marked with *)
-                        required = '*' in line
-                        question_text = line.replace('*', '').strip()
-                        question_text = clean_text(question_text)
-                        
-                        # Check if next line has options
-                        if i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
-                            options = []
-                            while i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
-                                i += 1
-                                option_text = lines[i].strip()
-                                # Remove option markers and clean text
-                                option_text = option_text.split(')', 1)[1].strip() if ')' in option_text else option_text
-                                option_text = clean_text(option_text)
-                                options.append(option_text)
-                            
-                            questions.append({
-                                'text': question_text,
-                                'type': 'multiple_choice',
-                                'options': options,
-                                'required': required
-                            })
-                        else:
-                            questions.append({
-                                'text': question_text,
-                                'type': 'text',
-                                'required': required
-                            })
-                    
-                    i += 1
-                    
-    except Exception as e:
-        flash(f'Error processing PDF: {str(e)}')
-    return questions
+        for subq_idx, subq_data in enumerate(option_data.get('subquestions', [])):
+            sub_options = subq_data.get('options')
+            subquestion_rows.append({
+                'parent_option': option_text,
+                'question_text': subq_data.get('text', ''),
+                'question_type': subq_data.get('type', 'text'),
+                'options': json_dumps(sub_options) if isinstance(sub_options, list) else None,
+                'required': subq_data.get('required', False),
+                'order': subq_idx,
+                'nesting_level': 1
+            })
+
+            # Nested subquestions (level 2) hang off the subquestion's own options
+            if not isinstance(sub_options, list):
+                continue
+            for nested_option in sub_options:
+                if not isinstance(nested_option, dict) or 'subquestions' not in nested_option:
+                    continue
+                for nested_subq_idx, nested_subq in enumerate(nested_option['subquestions']):
+                    subquestion_rows.append({
+                        'parent_option': f"{option_text}|{nested_option.get('text', '')}",
+                        'question_text': nested_subq.get('text', ''),
+                        'question_type': nested_subq.get('type', 'text'),
+                        'options': json_dumps(nested_subq['options']) if 'options' in nested_subq else None,
+                        'required': nested_subq.get('required', False),
+                        'order': nested_subq_idx,
+                        'nesting_level': 2
+                    })
+
+    return row, subquestion_rows
+
+def delete_subquestions(subquestion_ids):
+    """Delete subquestions and the answers given to them"""
+    if not subquestion_ids:
+        return
+    SubQuestionAnswer.query.filter(
+        SubQuestionAnswer.subquestion_id.in_(subquestion_ids)
+    ).delete(synchronize_session=False)
+    SubQuestion.query.filter(SubQuestion.id.in_(subquestion_ids)).delete(synchronize_session=False)
+
+def delete_questions(question_ids):
+    """Delete questions with their subquestions and every answer that references them"""
+    if not question_ids:
+        return
+    subquestion_ids = select(SubQuestion.id).where(SubQuestion.question_id.in_(question_ids))
+    SubQuestionAnswer.query.filter(
+        SubQuestionAnswer.subquestion_id.in_(subquestion_ids)
+    ).delete(synchronize_session=False)
+    SubQuestion.query.filter(SubQuestion.question_id.in_(question_ids)).delete(synchronize_session=False)
+    Answer.query.filter(Answer.question_id.in_(question_ids)).delete(synchronize_session=False)
+    Question.query.filter(Question.id.in_(question_ids)).delete(synchronize_session=False)
+
+def sync_subquestions(subquestions_by_question):
+    """
+    Merge the editor's subquestions into the stored ones
+
+    The payload has no subquestion IDs, so rows are matched on their slot: question,
+    parent option, nesting level and order. Matched rows are updated only if they
+    changed, new slots are inserted and stored rows left without a slot are deleted
+    together with their answers.
+
+    Args:
+        subquestions_by_question: {question_id: [subquestion row, ...]}
+
+    Returns:
+        bool: True if any subquestion was inserted, updated or deleted
+    """
+    if not subquestions_by_question:
+        return False
+
+    stored = {}
+    rows = db.session.query(*SUBQUESTION_COLUMNS).filter(
+        SubQuestion.question_id.in_(list(subquestions_by_question))
+    ).order_by(SubQuestion.id)
+    for row in rows:
+        stored.setdefault((row.question_id, row.parent_option, row.nesting_level, row.order), []).append(row)
+
+    updates = []
+    inserts = []
+    for question_id, subquestion_rows in subquestions_by_question.items():
+        for row in subquestion_rows:
+            row = dict(row, question_id=question_id)
+            matches = stored.get((question_id, row['parent_option'], row['nesting_level'], row['order']))
+            if not matches:
+                inserts.append(row)
+                continue
+            current = matches.pop(0)
+            if any(getattr(current, key) != value for key, value in row.items()):
+                updates.append(dict(row, id=current.id))
+
+    removed = [row.id for matches in stored.values() for row in matches]
+    delete_subquestions(removed)
+    if updates:
+        db.session.execute(update(SubQuestion), updates)
+    if inserts:
+        db.session.execute(insert(SubQuestion.__table__), inserts)
+
+    return bool(removed or updates or inserts)
 
 @app.route('/form/<int:form_id>/update', methods=['POST'])
 @login_required
@@ -1115,145 +4194,246 @@ def update_form(form_id):
         if 'show_score' in data:
             form.show_score = data['show_score']
         
-        # Begin transaction
-        # Step 1: Delete all old subquestions (this will cascade to subquestion answers)
-        subquestions = SubQuestion.query.join(Question).filter(Question.form_id == form_id).all()
-        for sq in subquestions:
-            db.session.delete(sq)
-        
-        # Step 2: Delete old questions (which will cascade to their answers)
-        questions = Question.query.filter_by(form_id=form_id).all()
-        for q in questions:
-            db.session.delete(q)
+        # Diff the submitted questions against the stored ones by their stable IDs
+        existing = {
+            row.id: row for row in db.session.query(*QUESTION_COLUMNS).filter(Question.form_id == form_id)
+        }
         
-        db.session.commit()
-
-        # Step 3: Re-create questions with their subquestions
+        question_ids = []  # Final question ID per payload position, None until inserted
+        question_updates = []
+        new_questions = []  # (payload position, row)
+        subquestions = []  # Subquestion rows per payload position
         for idx, q_data in enumerate(data['questions']):
-            question_type = q_data['question_type']
+            row, subquestion_rows = build_question_rows(q_data, form_id, idx)
+            subquestions.append(subquestion_rows)
             
-            # Create main question
-            question = Question(
-                form_id=form_id,
-                question_text=q_data['question_text'],
-                question_type=question_type,
-                required=q_data.get('required', False),
-                order=idx,
-                # Add quiz-related fields
-                is_quiz_question=q_data.get('is_quiz_question', False),
-                correct_answer=q_data.get('correct_answer', None),
-                points=q_data.get('points', 0),
-                feedback=q_data.get('feedback', None)
-            )
-            
-            # Process options for choice-based questions
-            if question_type in ['radio', 'multiple_choice', 'checkbox']:
-                options_data = q_data.get('options', [])
-                
-                # If options is a string, try to parse it
-                if isinstance(options_data, str):
-                    try:
-                        options_data = json.loads(options_data)
-                    except:
-                        options_data = []
-                
-                # Save options as JSON
-                question.options = json.dumps(options_data)
-                
-                # Add question to session so we can get its ID for subquestions
-                db.session.add(question)
-                db.session.flush()  # This assigns the ID but doesn't commit
-                
-                # Process subquestions if they exist
-                for option_idx, option_data in enumerate(options_data):
-                    # Check if this is a simple option string or an object with subquestions
-                    if isinstance(option_data, dict):
-                        option_text = option_data.get('text', '')
-                        subquestions_data = option_data.get('subquestions', [])
-                        
-                        # Process each subquestion for this option
-                        for subq_idx, subq_data in enumerate(subquestions_data):
-                            sub_q = SubQuestion(
-                                question_id=question.id,
-                                parent_option=option_text,
-                                question_text=subq_data.get('text', ''),
-                                question_type=subq_data.get('type', 'text'),
-                                required=subq_data.get('required', False),
-                                order=subq_idx,
-                                nesting_level=1
-                            )
-                            
-                            # Handle options for subquestions
-                            if 'options' in subq_data:
-                                sub_options = subq_data['options']
-                                if isinstance(sub_options, list):
-                                    sub_q.options = json.dumps(sub_options)
-                                    
-                                    # Process nested subquestions (level 2)
-                                    for nested_idx, nested_option in enumerate(sub_options):
-                                        if isinstance(nested_option, dict) and 'subquestions' in nested_option:
-                                            for nested_subq_idx, nested_subq in enumerate(nested_option['subquestions']):
-                                                nested_q = SubQuestion(
-                                                    question_id=question.id,
-                                                    parent_option=f"{option_text}|{nested_option.get('text', '')}",
-                                                    question_text=nested_subq.get('text', ''),
-                                                    question_type=nested_subq.get('type', 'text'),
-                                                    required=nested_subq.get('required', False),
-                                                    order=nested_subq_idx,
-                                                    nesting_level=2
-                                                )
-                                                
-                                                if 'options' in nested_subq:
-                                                    nested_q.options = json.dumps(nested_subq['options'])
-                                                
-                                                db.session.add(nested_q)
-                            
-                            db.session.add(sub_q)
+            question_id = parse_question_id(q_data.get('id'))
+            if question_id in existing:
+                stored = existing.pop(question_id)
+                if any(getattr(stored, key) != value for key, value in row.items()):
+                    question_updates.append(dict(row, id=question_id))
+                question_ids.append(question_id)
             else:
-                # For non-choice questions, just save without options
-                db.session.add(question)
+                new_questions.append((idx, row))
+                question_ids.append(None)
+        
+        # Whatever is left in `existing` was removed in the editor
+        delete_questions(list(existing))
+        
+        if question_updates:
+            db.session.execute(update(Question), question_updates)
+        
+        new_ids = insert_returning_ids(Question.__table__, [row for _, row in new_questions])
+        for (idx, _), question_id in zip(new_questions, new_ids):
+            question_ids[idx] = question_id
+        
+        subquestions_changed = sync_subquestions(dict(zip(question_ids, subquestions)))
+        
+        # Make every worker recompile the cached form schema, unless an autosave changed nothing
+        if existing or question_updates or new_questions or subquestions_changed or db.session.is_modified(form):
+            invalidate_form_schema(form)
         
         # Commit all changes
         db.session.commit()
-        return jsonify({'message':'Form updated successfully', 'status': 'success'}), 200
+        return jsonify({'message':'Form updated successfully', 'status': 'success', 'question_ids': question_ids}), 200
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def load_latest_postback_logs(tracking_ids, limit):
+    """
+    Load the latest logs of each tracking ID with a single window-function query
+    
+    Logs are ranked per tracking ID newest first, which walks the
+    (tracking_id, timestamp) index, so a busy tracking ID can't crowd out the others.
+    
+    Returns:
+        dict: {tracking_id: [PostbackLog, ...]} newest first
+    """
+    if not tracking_ids:
+        return {}
+    
+    ranked = select(
+        PostbackLog,
+        func.row_number().over(
+            partition_by=PostbackLog.tracking_id,
+            order_by=(PostbackLog.timestamp.desc(), PostbackLog.id.desc())
+        ).label('rank')
+    ).where(PostbackLog.tracking_id.in_(tracking_ids)).subquery()
+    log = aliased(PostbackLog, ranked)
+    
+    logs = {}
+    for row in db.session.scalars(
+        select(log).where(ranked.c.rank <= limit).order_by(ranked.c.tracking_id, ranked.c.rank)
+    ):
+        logs.setdefault(row.tracking_id, []).append(row)
+    return logs
+
+def load_postback_aggregates(tracking_ids):
+    """
+    Count postbacks and sum payouts per tracking ID and status from the daily rollups
+    
+    Returns:
+        dict: {tracking_id: {'count', 'total_payout', 'statuses': {status: count}}}
+    """
+    aggregates = {
+        tracking_id: {'count': 0, 'total_payout': 0.0, 'statuses': {}}
+        for tracking_id in tracking_ids
+    }
+    if not tracking_ids:
+        return aggregates
+    
+    rows = db.session.query(
+        PostbackRollup.tracking_id,
+        PostbackRollup.status,
+        func.sum(PostbackRollup.transaction_count),
+        func.sum(PostbackRollup.total_payout)
+    ).filter(
+        PostbackRollup.tracking_id.in_(tracking_ids),
+        PostbackRollup.granularity == 'day'
+    ).group_by(PostbackRollup.tracking_id, PostbackRollup.status)
+    
+    for tracking_id, status, count, payout in rows:
+        aggregate = aggregates[tracking_id]
+        aggregate['count'] += count
+        aggregate['total_payout'] += payout or 0
+        status = status or 'unknown'
+        aggregate['statuses'][status] = aggregate['statuses'].get(status, 0) + count
+    return aggregates
+
+def load_postback_log_page(tracking_id, before=None, limit=20):
+    """
+    Load one page of a tracking ID's logs, newest first
+    
+    Pages are keyed on (timestamp, id) of the last log of the previous page, so
+    each page is an index range scan no matter how deep it is.
+    
+    Returns:
+        list: PostbackLog rows
+        bool: Whether older logs exist
+    """
+    query = PostbackLog.query.filter(PostbackLog.tracking_id == tracking_id)
+    if before is not None:
+        cursor = db.session.query(PostbackLog.timestamp, PostbackLog.id).filter(
+            PostbackLog.id == before,
+            PostbackLog.tracking_id == tracking_id
+        ).first()
+        if cursor is None:
+            return [], False
+        query = query.filter(or_(
+            PostbackLog.timestamp < cursor.timestamp,
+            and_(PostbackLog.timestamp == cursor.timestamp, PostbackLog.id < cursor.id)
+        ))
+    logs = query.order_by(PostbackLog.timestamp.desc(), PostbackLog.id.desc()).limit(limit + 1).all()
+    return logs[:limit], len(logs) > limit
+
+def postback_log_to_dict(log):
+    return {
+        'id': log.id,
+        'timestamp': log.timestamp.isoformat() if log.timestamp else None,
+        'transaction_id': log.transaction_id,
+        'username': log.username,
+        'user_id': log.user_id,
+        'status': log.status,
+        'payout': log.payout
+    }
+
 @app.route('/postback/dashboard')
 @login_required
 def postback_dashboard():
-    # Get all forms for this user
-    forms = Form.query.filter_by(user_id=current_user.id).all()
-    
-    # Get tracking IDs for these forms
-    form_ids = [form.id for form in forms]
-    trackings = PostbackTracking.query.filter(PostbackTracking.form_id.in_(form_ids)).all()
+    # Forms of this user that have postback tracking, with the first tracking of each
+    rows = db.session.query(Form, PostbackTracking).join(
+        PostbackTracking, PostbackTracking.form_id == Form.id
+    ).filter(Form.user_id == current_user.id).order_by(Form.id, PostbackTracking.id)
     
-    # Get tracking IDs
-    tracking_ids = [t.tracking_id for t in trackings]
+    form_trackings = {}
+    for form, tracking in rows:
+        form_trackings.setdefault(form.id, (form, tracking))
     
-    # Get logs for these tracking IDs
-    logs = PostbackLog.query.filter(PostbackLog.tracking_id.in_(tracking_ids)).order_by(PostbackLog.timestamp.desc()).limit(100).all()
+    tracking_ids = [tracking.tracking_id for _, tracking in form_trackings.values()]
+    limit = app.config['POSTBACK_DASHBOARD_LOGS']
+    logs = load_latest_postback_logs(tracking_ids, limit)
+    aggregates = load_postback_aggregates(tracking_ids)
     
-    # Group by form
     form_postbacks = {}
-    for form in forms:
-        form_tracking = next((t for t in trackings if t.form_id == form.id), None)
-        if form_tracking:
-            form_logs = [log for log in logs if log.tracking_id == form_tracking.tracking_id]
-            postback_url = f"http://pepper-ads.com/postback?tracking_id={form_tracking.tracking_id}&user_id={form.user_id}"
-            
-            form_postbacks[form.id] = {
-                'form': form,
-                'tracking': form_tracking,
-                'logs': form_logs,
-                'postback_url': postback_url
-            }
+    for form_id, (form, tracking) in form_trackings.items():
+        form_logs = logs.get(tracking.tracking_id, [])
+        postback_url = f"http://pepper-ads.com/postback?tracking_id={tracking.tracking_id}&user_id={form.user_id}"
+        
+        form_postbacks[form_id] = {
+            'form': form,
+            'tracking': tracking,
+            'logs': form_logs,
+            'stats': aggregates[tracking.tracking_id],
+            'has_more': aggregates[tracking.tracking_id]['count'] > len(form_logs),
+            'postback_url': postback_url
+        }
     
     return render_template('postback_dashboard.html', form_postbacks=form_postbacks)
 
+@app.route('/postback/dashboard/forms/<int:form_id>/logs')
+@login_required
+def postback_form_logs(form_id):
+    """Older postback logs of a form, paged with ?before=<log id>"""
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        abort(404)
+    
+    tracking = PostbackTracking.query.filter_by(form_id=form.id).order_by(PostbackTracking.id).first()
+    if tracking is None:
+        return jsonify({'logs': [], 'has_more': False, 'next_before': None})
+    
+    before = request.args.get('before', type=int)
+    limit = min(request.args.get('limit', app.config['POSTBACK_DASHBOARD_LOGS'], type=int), 500)
+    logs, has_more = load_postback_log_page(tracking.tracking_id, before=before, limit=limit)
+    
+    return jsonify({
+        'logs': [postback_log_to_dict(log) for log in logs],
+        'has_more': has_more,
+        'next_before': logs[-1].id if has_more else None
+    })
+
+@app.route('/postback/dashboard/forms/<int:form_id>/rollups')
+@login_required
+def postback_form_rollups(form_id):
+    """Postback counts and payouts of a form per hour or day, ?granularity=hour|day&since=<ISO date>"""
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        abort(404)
+    
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in POSTBACK_ROLLUP_GRANULARITIES:
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+    try:
+        since = datetime.fromisoformat(request.args['since']) if 'since' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO date'}), 400
+    if since is None:
+        since = datetime.utcnow() - (timedelta(days=2) if granularity == 'hour' else timedelta(days=30))
+    
+    tracking_ids = [row.tracking_id for row in db.session.query(PostbackTracking.tracking_id).filter_by(form_id=form.id)]
+    rows = db.session.query(PostbackRollup).filter(
+        PostbackRollup.tracking_id.in_(tracking_ids),
+        PostbackRollup.granularity == granularity,
+        PostbackRollup.period_start >= rollup_period_start(since, granularity)
+    ).order_by(PostbackRollup.period_start)
+    
+    periods = OrderedDict()
+    for row in rows:
+        period = periods.setdefault(row.period_start, {
+            'period_start': row.period_start.isoformat(),
+            'count': 0,
+            'total_payout': 0.0,
+            'statuses': {}
+        })
+        period['count'] += row.transaction_count
+        period['total_payout'] += row.total_payout
+        status = row.status or 'unknown'
+        period['statuses'][status] = period['statuses'].get(status, 0) + row.transaction_count
+    
+    return jsonify({'granularity': granularity, 'periods': list(periods.values())})
+
 @app.route('/postback', methods=['GET', 'POST'])
 def receive_postback():
     # Get parameters from either GET or POST
@@ -1264,7 +4444,7 @@ def receive_postback():
     
     # Extract key parameters
     tracking_id = params.get('tracking_id')
-    transaction_id = params.get('transaction_id')
+    transaction_id = params.get('transaction_id') or None  # Empty IDs are never deduplicated
     username = params.get('username')
     user_id = params.get('user_id')
     status = params.get('status')
@@ -1280,82 +4460,67 @@ def receive_postback():
         except ValueError:
             payout = None
     
-    # Find the tracking record
-    tracking = PostbackTracking.query.filter_by(tracking_id=tracking_id).first()
-    
-    if tracking:
-        # Increment transaction count
-        tracking.transaction_count += 1
-        tracking.last_updated = datetime.utcnow()
-        
-        # Create log entry
-        log = PostbackLog(
-            tracking_id=tracking_id,
-            transaction_id=transaction_id,
-            username=username,
-            user_id=user_id,
-            status=status,
-            payout=payout,
-            response_json=json.dumps(params),
-            ip_address=request.remote_addr
-        )
-        
-        db.session.add(log)
-        db.session.commit()
-        
-        # Save to JSON file
-        save_postback_to_json({
-            'tracking_id': tracking_id,
-            'transaction_id': transaction_id,
-            'username': username,
-            'user_id': user_id,
-            'status': status,
-            'payout': payout,
-            'all_params': params,
-            'ip_address': request.remote_addr
-        })
-        
+    # Known tracking IDs are answered from memory
+    if tracking_cache.get_form_id(tracking_id) is None:
+        return jsonify({'status': 'error', 'message': 'Invalid tracking_id'}), 404
+    
+    # Retries of a transaction are acknowledged but not stored again
+    if transaction_id and postback_dedup_filter.is_duplicate(tracking_id, transaction_id):
         return jsonify({
             'status': 'success',
-            'message': 'Postback received',
+            'message': 'Duplicate postback ignored',
             'tracking_id': tracking_id
         })
-    else:
-        return jsonify({'status': 'error', 'message': 'Invalid tracking_id'}), 404
+    
+    record = {
+        'tracking_id': tracking_id,
+        'transaction_id': transaction_id,
+        'username': username,
+        'user_id': user_id,
+        'status': status,
+        'payout': payout,
+        'response_json': json_dumps(params),
+        'ip_address': request.remote_addr,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    try:
+        if app.config['POSTBACK_INGEST_ASYNC']:
+            # Spooled to disk, the log row and transaction count are stored in a batch shortly after
+            postback_ingestor.ingest(record)
+        else:
+            store_postbacks([record])
+            db.session.commit()
+    except Exception:
+        # Not stored, the network's retry must not be taken for a duplicate
+        db.session.rollback()
+        if transaction_id:
+            postback_dedup_filter.forget(tracking_id, transaction_id)
+        raise
+    
+    # Save to JSON file
+    save_postback_to_json({
+        'tracking_id': tracking_id,
+        'transaction_id': transaction_id,
+        'username': username,
+        'user_id': user_id,
+        'status': status,
+        'payout': payout,
+        'all_params': params,
+        'ip_address': request.remote_addr
+    })
+    
+    return jsonify({
+        'status': 'success',
+        'message': 'Postback received',
+        'tracking_id': tracking_id
+    })
 
 @app.route('/form/<int:form_id>/embed')
 def embed_form(form_id):
     """Route for displaying a form in an embedded iframe context"""
-    form = Form.query.get_or_404(form_id)
-    
-    # Get all subquestions for this form
-    subquestions = SubQuestion.query.join(Question).filter(Question.form_id == form_id).all()
-
-    # Process each question to handle nested structures
-    for question in form.questions:
-        if question.question_type in ['radio', 'multiple_choice']:
-            try:
-                # Parse options with full nested structure
-                question.nested_options = json.loads(question.options or '[]')
-                
-                # If options is a plain array, convert to nested format
-                if question.nested_options and isinstance(question.nested_options[0], str):
-                    question.nested_options = [{"text": opt, "subquestions": []} for opt in question.nested_options]
-            except (json.JSONDecodeError, TypeError, IndexError):
-                # Fallback for legacy data format
-                try:
-                    raw_options = question.get_options()
-                    # Convert simple options to the nested format
-                    question.nested_options = [
-                        {"text": opt, "subquestions": []} 
-                        for opt in raw_options if opt
-                    ]
-                except Exception:
-                    # Last resort fallback
-                    question.nested_options = []
-
-    # Sort questions by order
-    form.questions.sort(key=lambda q: q.order)
+    # Compiled schema already has parsed options, nested options and questions sorted by order
+    form = get_form_schema(form_id)
+    subquestions = form.subquestions
     
     # Check if this is an embedded view (like Google Forms' embedded=true parameter)
     is_embedded = request.args.get('embedded') == 'true'
@@ -1438,61 +4603,110 @@ def upload_pdf():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file.save(file_path)
+            # Stored by content, uploading the same PDF again reuses the file and its parsed questions
+            content_hash, stored_filename = store_upload_by_hash(file, app.config['UPLOAD_FOLDER'], 'pdf')
             
             # Create PDF upload record
             pdf_upload = PDFUpload(
-                filename=unique_filename,
+                filename=stored_filename,
                 original_filename=filename,
+                content_hash=content_hash,
                 user_id=current_user.id,
                 form_id=None  # Will be updated after form creation
             )
             db.session.add(pdf_upload)
-            db.session.commit()
+            db.session.flush()
             
-            # Extract questions and create form
-            questions = extract_questions_from_pdf(file_path)
-            if questions:
-                form = Form(
-                    title=f"Form from {filename}",
-                    description="Automatically generated from PDF",
-                    user_id=current_user.id,
-                    company_id=session.get('referral_company_id')
-                )
-                db.session.add(form)
-                db.session.commit()
-                
-                # Update PDF upload with form ID
-                pdf_upload.form_id = form.id
-                
-                # Add questions to form
-                for i, q in enumerate(questions):
-                    question = Question(
-                        form_id=form.id,
-                        question_text=q['text'],
-                        question_type=q['type'],
-                        required=q['required'],
-                        order=i
-                    )
-                    if 'options' in q:
-                        question.set_options(q['options'])
-                    db.session.add(question)
+            questions = parsed_document_cache.get('pdf', content_hash, pdf_parser_version())
+            if questions is not None:
+                if not questions:
+                    db.session.rollback()
+                    flash('No questions found in the PDF')
+                    return redirect(request.url)
                 
+                form, warning = create_form_from_pdf_questions(
+                    pdf_upload, questions, current_user.id, session.get('referral_company_id'),
+                    app.config['PDF_MAX_QUESTIONS']
+                )
                 db.session.commit()
-                
-                # Clear referral from session after form creation
                 session.pop('referral_company_id', None)
                 
+                if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                    return jsonify({
+                        'form_id': form.id,
+                        'status': 'done',
+                        'error': warning,
+                        'redirect_url': url_for('edit_form', form_id=form.id)
+                    }), 201
                 flash('Form generated successfully!')
+                if warning:
+                    flash(warning, 'warning')
                 return redirect(url_for('edit_form', form_id=form.id))
-            else:
-                flash('No questions found in the PDF')
-                return redirect(url_for('upload_pdf'))
+            
+            # Questions are extracted in the background, the form is created when the job finishes
+            job = PDFExtractionJob(
+                pdf_upload_id=pdf_upload.id,
+                user_id=current_user.id,
+                company_id=session.get('referral_company_id')
+            )
+            db.session.add(job)
+            db.session.commit()
+            pdf_extraction_worker.enqueue(job.id)
+            
+            # Clear referral from session, the job carries it to the generated form
+            session.pop('referral_company_id', None)
+            
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return jsonify({
+                    'job_id': job.id,
+                    'status': job.status,
+                    'status_url': url_for('pdf_job_status', job_id=job.id)
+                }), 202
+            return redirect(url_for('pdf_job', job_id=job.id))
     
     return render_template('upload_pdf.html')
 
+def get_pdf_job_or_404(job_id):
+    job = db.session.get(PDFExtractionJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        abort(404)
+    return job
+
+@app.route('/upload_pdf/jobs/<int:job_id>')
+@login_required
+def pdf_job(job_id):
+    job = get_pdf_job_or_404(job_id)
+    
+    if job.status == 'done':
+        flash('Form generated successfully!')
+        if job.error:
+            flash(job.error, 'warning')
+        return redirect(url_for('edit_form', form_id=job.form_id))
+    if job.status == 'failed':
+        flash(job.error or 'Error processing PDF')
+        return redirect(url_for('upload_pdf'))
+    
+    return render_template('pdf_job.html', job=job)
+
+@app.route('/upload_pdf/jobs/<int:job_id>/status')
+@login_required
+def pdf_job_status(job_id):
+    job = get_pdf_job_or_404(job_id)
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'pages_total': job.pages_total,
+        'pages_done': job.pages_done,
+        'form_id': job.form_id,
+        'error': job.error,
+        'redirect_url': url_for('pdf_job', job_id=job.id) if job.status in ('done', 'failed') else None
+    })
+
+@app.route('/parse_cache/stats')
+@login_required
+def parse_cache_stats():
+    return jsonify(parsed_document_cache.stats())
+
 def parse_mindmap_to_form(mindmap_text):
     form_data = {
         "title": "",
@@ -1563,7 +4777,11 @@ def upload_mindmap():
             return redirect(request.url)
             
         try:
-            form_data = parse_mindmap_to_form(mindmap_text)
+            content_hash = hashlib.sha256(mindmap_text.encode('utf-8')).hexdigest()
+            form_data = parsed_document_cache.get('mindmap', content_hash, mindmap_parser_version())
+            if form_data is None:
+                form_data = parse_mindmap_to_form(mindmap_text)
+                parsed_document_cache.put('mindmap', content_hash, mindmap_parser_version(), form_data)
             
             form = Form(
                 title=form_data["title"],
@@ -2108,6 +5326,7 @@ def toggle_form_status(form_id):
         
     # Toggle the is_closed status
     form.is_closed = not form.is_closed
+    invalidate_form_schema(form)
     db.session.commit()
     
     status = "closed" if form.is_closed else "reopened"
@@ -2152,6 +5371,85 @@ def form_terms_and_conditions(form_id):
     form = Form.query.get_or_404(form_id)
     return render_template('terms_and_conditions.html', form=form, now=datetime.now())
 
+def hot_path_queries(form_id=1, user_id=1, tracking_id=''):
+    """Representative statements issued by the dashboard, responses, export and postback routes"""
+    return {
+        'dashboard: forms for user': select(Form).where(Form.user_id == user_id),
+        'form schema: questions for form': select(Question).where(Question.form_id == form_id).order_by(Question.order),
+        'form schema: subquestions for form': select(SubQuestion).join(Question).where(Question.form_id == form_id),
+        'responses: page of response ids': select(Response.id).where(Response.form_id == form_id).order_by(Response.id.desc()).limit(51),
+        'responses: summary aggregates': select(func.count(Response.id), func.max(Response.submitted_at)).where(Response.form_id == form_id),
+        'responses: answers for page': select(Answer).where(Answer.response_id.in_([1, 2, 3])),
+        'export: subquestion answers for batch': select(SubQuestionAnswer).where(SubQuestionAnswer.response_id.in_([1, 2, 3])),
+        'export: unexported responses': select(Response).where(Response.exported_at.is_(None), Response.id > 0).order_by(Response.id).limit(200),
+        'postback: tracking for form': select(PostbackTracking).where(PostbackTracking.form_id == form_id),
+        'postback: tracking by id': select(PostbackTracking).where(PostbackTracking.tracking_id == tracking_id),
+        'postback: latest logs for tracking': select(PostbackLog).where(PostbackLog.tracking_id == tracking_id).order_by(PostbackLog.timestamp.desc()).limit(100),
+        'postback: duplicate transaction': select(PostbackLog.id).where(PostbackLog.tracking_id == tracking_id, PostbackLog.transaction_id == '').limit(1),
+        'postback: rollups for tracking': select(PostbackRollup).where(PostbackRollup.tracking_id == tracking_id, PostbackRollup.granularity == 'day'),
+    }
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Explain the hot-path queries and fail if any of them scans a whole table"""
+    dialect = db.engine.dialect
+    explain = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    
+    full_scans = []
+    for name, statement in hot_path_queries().items():
+        sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+        plan = [' '.join(str(part) for part in row) for row in db.session.execute(text(explain + sql))]
+        
+        # SQLite reports "SCAN <table>" without "USING ... INDEX" for a full scan, Postgres "Seq Scan"
+        scanned = [line for line in plan if ('SCAN' in line and 'USING' not in line) or 'Seq Scan' in line]
+        print(f"{'FULL SCAN' if scanned else 'ok':<10} {name}")
+        for line in plan:
+            print(f"           {line}")
+        if scanned:
+            full_scans.append(name)
+    
+    if full_scans:
+        raise SystemExit(f"{len(full_scans)} hot-path queries do a full table scan: {', '.join(full_scans)}")
+
+@app.cli.command('recompute-postback-totals')
+def recompute_postback_totals_command():
+    """Rebuild transaction counts and payout totals of every postback tracking from the stored logs"""
+    updated = recompute_postback_totals()
+    print(f"Recomputed totals for {updated} postback trackings")
+
+@app.cli.command('backfill-postback-rollups')
+@click.option('--batch-size', default=50000, help='Logs rolled up per transaction')
+def backfill_postback_rollups_command(batch_size):
+    """Rebuild the hourly and daily postback rollups from the stored logs"""
+    rolled_up = backfill_postback_rollups(batch_size)
+    print(f"Rolled up {rolled_up} postback logs")
+
+@app.cli.command('rebucket-response-exports')
+def rebucket_response_exports_command():
+    """Move flat exports/survey_responses files into per-form, per-day buckets"""
+    moved = rebucket_response_exports()
+    print(f"Moved {moved} response exports into form buckets")
+
+@app.cli.command('snapshot-responses')
+@click.argument('form_ids', type=int, nargs=-1)
+@click.option('--batch-size', default=None, type=int, help='Responses appended per query')
+def snapshot_responses_command(form_ids, batch_size):
+    """Append new responses to the columnar snapshots of the given forms, or of every form"""
+    existing = {form_id for form_id, in db.session.query(Form.id)}
+    for form_id in form_ids or sorted(existing):
+        if form_id not in existing:
+            print(f"Form {form_id} not found")
+            continue
+        appended = update_response_snapshot(get_form_schema(form_id), batch_size)
+        print(f"Appended {appended} responses to the snapshot of form {form_id}")
+
+@app.cli.command('rescore-quiz')
+@click.argument('form_id', type=int)
+def rescore_quiz_command(form_id):
+    """Re-grade all stored responses of a quiz against its current answer keys"""
+    rescored = rescore_quiz_responses(form_id)
+    print(f"Rescored {rescored} responses for form {form_id}")
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
@@ -0,0 +1,167 @@
+"""
+Benchmark write throughput of concurrent form submitters against SQLite
+
+Each submitter is a separate process (like a gunicorn worker) that imports the
+app with a given SQLite profile and commits responses with answers as fast as it
+can. The legacy profile (rollback journal, no busy timeout) is compared with the
+default WAL profile.
+
+--mode picks the write path:
+    orm    one ORM object per answer after a flush (the old submit_form path)
+    bulk   insert_submissions(), one executemany per table
+    group  save_submission() with SUBMIT_GROUP_COMMIT on, --threads request
+           threads per process share the group committer
+
+Usage:
+    python benchmark_concurrent_submits.py [--workers 8] [--seconds 10] [--answers 20]
+                                           [--mode bulk] [--threads 1]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+PROFILES = {
+    'legacy (DELETE journal, FULL sync, no busy timeout)': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_BUSY_TIMEOUT_MS': '0',
+    },
+    'default (WAL, NORMAL sync, busy timeout)': {},
+}
+
+def load_app(db_path, profile):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.update(profile)
+    import app as app_module
+    return app_module
+
+def setup_database(db_path, profile, answers):
+    app_module = load_app(db_path, profile)
+    with app_module.app.app_context():
+        db = app_module.db
+        db.create_all()
+        user = app_module.User(email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.flush()
+        form = app_module.Form(title='Benchmark', user_id=user.id)
+        db.session.add(form)
+        db.session.flush()
+        for i in range(answers):
+            db.session.add(app_module.Question(form_id=form.id, question_text=f'Question {i}',
+                                               question_type='text', order=i))
+        db.session.commit()
+        return form.id
+
+def submit_orm(app_module, form_id, question_ids):
+    db = app_module.db
+    response = app_module.Response(form_id=form_id, device_type='desktop')
+    db.session.add(response)
+    db.session.flush()
+    for question_id in question_ids:
+        db.session.add(app_module.Answer(response_id=response.id, question_id=question_id,
+                                         answer_text='benchmark answer'))
+    db.session.commit()
+
+def submit_bulk(app_module, form_id, question_ids):
+    response_values = {'form_id': form_id, 'device_type': 'desktop'}
+    answers = [{'question_id': question_id, 'answer_text': 'benchmark answer'} for question_id in question_ids]
+    app_module.save_submission(response_values, answers, [])
+
+def submit_loop(app_module, submit, form_id, question_ids, deadline, counts):
+    db = app_module.db
+    with app_module.app.app_context():
+        while time.time() < deadline:
+            try:
+                submit(app_module, form_id, question_ids)
+                counts['committed'] += 1
+            except Exception as e:
+                db.session.rollback()
+                if 'locked' in str(e):
+                    counts['locked'] += 1
+                else:
+                    raise
+            finally:
+                db.session.remove()
+
+def submitter(db_path, profile, mode, threads, form_id, seconds, start_at, results):
+    app_module = load_app(db_path, profile)
+    submit = submit_orm if mode == 'orm' else submit_bulk
+
+    commits = [0]
+    with app_module.app.app_context():
+        # Without a busy timeout the legacy profile can be locked out while the others connect
+        while True:
+            try:
+                question_ids = [q.id for q in app_module.Question.query.filter_by(form_id=form_id)]
+                break
+            except Exception as e:
+                app_module.db.session.rollback()
+                if 'locked' not in str(e):
+                    raise
+        app_module.event.listen(app_module.db.engine, 'commit',
+                                lambda conn: commits.__setitem__(0, commits[0] + 1))
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    cpu_start = time.process_time()
+    counts = [{'committed': 0, 'locked': 0} for _ in range(threads)]
+    loops = [
+        threading.Thread(target=submit_loop, args=(app_module, submit, form_id, question_ids, start_at + seconds, c))
+        for c in counts
+    ]
+    for loop in loops:
+        loop.start()
+    for loop in loops:
+        loop.join()
+    results.put((sum(c['committed'] for c in counts), sum(c['locked'] for c in counts),
+                 commits[0], time.process_time() - cpu_start))
+
+def run_profile(name, profile, mode, workers, threads, seconds, answers):
+    if mode == 'group':
+        profile = dict(profile, SUBMIT_GROUP_COMMIT='1')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            form_id = pool.apply(setup_database, (db_path, profile, answers))
+
+        results = ctx.Queue()
+        start_at = time.time() + 3
+        processes = [
+            ctx.Process(target=submitter, args=(db_path, profile, mode, threads, form_id, seconds, start_at, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        committed = sum(t[0] for t in totals)
+        locked = sum(t[1] for t in totals)
+        commits = sum(t[2] for t in totals)
+        cpu = sum(t[3] for t in totals)
+        print(f"{name}")
+        print(f"  {committed} submissions in {seconds}s = {committed / seconds:.0f}/s, "
+              f"{locked} 'database is locked' errors")
+        if committed:
+            print(f"  {commits} commits ({commits / committed:.2f} per submission), "
+                  f"{cpu / committed * 1000:.2f} ms CPU per submission")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent submitter processes')
+    parser.add_argument('--seconds', type=int, default=10, help='Duration of each run')
+    parser.add_argument('--answers', type=int, default=20, help='Answers per submission')
+    parser.add_argument('--mode', choices=['orm', 'bulk', 'group'], default='orm', help='Write path to exercise')
+    parser.add_argument('--threads', type=int, default=1, help='Request threads per submitter process')
+    args = parser.parse_args()
+
+    print(f"{args.workers} submitters x {args.threads} threads, {args.answers} answers per submission, "
+          f"{args.mode} write path")
+    for name, profile in PROFILES.items():
+        run_profile(name, profile, args.mode, args.workers, args.threads, args.seconds, args.answers)
@@ -0,0 +1,106 @@
+"""
+Compare JSON encoders on the payloads the app actually serializes
+
+Builds a small synthetic form with benchmark_response_summary.populate(), then
+encodes and decodes three payload shapes with every available encoder:
+
+    export     one response as built by app.build_response_exports()
+    postback   the record receive_postback() spools for each postback
+    summary    the response analytics returned by /form/<id>/responses/summary
+
+Encoders are the stdlib json module (as the app used it before json_dumps()),
+orjson when it is installed, and app.json_dumps() itself, which picks one of
+them according to JSON_ENCODER.
+
+Usage:
+    python benchmark_json.py [--responses 2000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from benchmark_response_summary import load_app, populate
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def encoders(app_module):
+    """Return [(name, dumps, loads)], dumps taking (obj, indent)"""
+    candidates = [
+        ('stdlib json', lambda obj, indent: json.dumps(obj, indent=2 if indent else None), json.loads),
+    ]
+    if orjson is not None:
+        candidates.append((
+            'orjson',
+            lambda obj, indent: orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0),
+            orjson.loads
+        ))
+    candidates.append((
+        f"app.json_dumps ({app_module.app.config['JSON_ENCODER']})",
+        lambda obj, indent: app_module.json_dumps_bytes(obj, indent=indent),
+        app_module.json_loads
+    ))
+    return candidates
+
+def postback_records(count):
+    return [{
+        'tracking_id': 'a1b2c3d4e5f6',
+        'transaction_id': f'txn-{i}',
+        'username': f'user{i % 500}',
+        'user_id': str(i % 500),
+        'status': 'approved' if i % 4 else 'pending',
+        'payout': round(0.25 * (i % 40), 2),
+        'response_json': json.dumps({'tracking_id': 'a1b2c3d4e5f6', 'transaction_id': f'txn-{i}', 'payout': '1.25'}),
+        'ip_address': '203.0.113.7',
+        'timestamp': datetime(2025, 5, 15, 14, 30, i % 60).isoformat()
+    } for i in range(count)]
+
+def measure(payloads, dumps, loads, indent, repeat):
+    """Return (encoded bytes, encode seconds, decode seconds) for one pass over the payloads, best of `repeat`"""
+    best_encode = best_decode = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encoded = [dumps(payload, indent) for payload in payloads]
+        best_encode = min(best_encode, time.perf_counter() - start)
+        start = time.perf_counter()
+        for data in encoded:
+            loads(data)
+        best_decode = min(best_decode, time.perf_counter() - start)
+    size = sum(len(data) for data in encoded)
+    return size, best_encode, best_decode
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=2000, help='Responses in the benchmark form')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes per measurement, the fastest is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module = load_app(os.path.join(tmp, 'bench.db'))
+        with app_module.app.app_context():
+            app_module.db.create_all()
+            form_id = populate(app_module, args.responses)
+            form = app_module.get_form_schema(form_id)
+            responses = app_module.Response.query.filter_by(form_id=form_id).order_by(app_module.Response.id).all()
+            shapes = [
+                ('export', app_module.build_response_exports(form, responses)),
+                ('postback', postback_records(args.responses)),
+                ('summary', [app_module.get_response_analytics(form)] * 50),
+            ]
+
+            print(f"{'payload':<10} {'encoder':<28} {'indent':<7} {'encode/s':>12} {'decode/s':>12} {'MB':>8}")
+            for shape, payloads in shapes:
+                for name, dumps, loads in encoders(app_module):
+                    for indent in (False, True):
+                        size, encode, decode = measure(payloads, dumps, loads, indent, args.repeat)
+                        print(f"{shape:<10} {name:<28} {'yes' if indent else 'no':<7} "
+                              f"{len(payloads) / encode:>12,.0f} {len(payloads) / decode:>12,.0f} {size / 1e6:>8.2f}")
+                print()
+
+if __name__ == '__main__':
+    main()
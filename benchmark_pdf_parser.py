@@ -0,0 +1,196 @@
+"""
+Check and benchmark the PDF question parser against a pinned corpus
+
+benchmark_data/pdf_parser holds text as extracted from PDFs (pages separated by
+form feeds) together with the question list each file must produce. The script
+fails if app.parse_questions_from_pages() produces anything else, then reports
+its throughput in lines/sec next to the original line-by-line parser, which is
+kept here as the baseline.
+
+Usage:
+    python benchmark_pdf_parser.py [--repeat 20]
+    python benchmark_pdf_parser.py --update    # re-pin the expected questions
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from app import parse_questions_from_pages
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_data', 'pdf_parser')
+
+def legacy_parse_questions_from_text(text):
+    """The parser as it was before the single-pass rewrite, one PDF page at a time"""
+    questions = []
+    lines = text.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        next_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
+
+        # Skip empty lines
+        if not line:
+            i += 1
+            continue
+
+        # Function to clean text - only keep alphabets and spaces
+        def clean_text(text):
+            # Keep only alphabets and spaces
+            text = ''.join(c for c in text if c.isalpha() or c == ' ')
+            # Remove extra spaces
+            text = ' '.join(text.split())
+            return text
+
+        # Check for multiple choice questions
+        if any(option in line for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
+            question_text = clean_text(line)
+            options = []
+            while i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
+                i += 1
+                option_text = lines[i].strip()
+                # Remove option markers and clean text
+                option_text = option_text.split(')', 1)[1].strip() if ')' in option_text else option_text
+                option_text = clean_text(option_text)
+                options.append(option_text)
+
+            questions.append({
+                'text': question_text,
+                'type': 'multiple_choice',
+                'options': options,
+                'required': True
+            })
+
+        # Check for checkbox questions
+        elif any(checkbox in line for checkbox in ['[ ]', '[  ]', '□']):
+            question_text = clean_text(line)
+            options = []
+            while i + 1 < len(lines) and any(checkbox in lines[i + 1] for checkbox in ['[ ]', '[  ]', '□']):
+                i += 1
+                option_text = lines[i].strip()
+                # Remove checkbox markers and clean text
+                option_text = option_text.replace('[ ]', '').replace('[  ]', '').replace('□', '').strip()
+                option_text = clean_text(option_text)
+                options.append(option_text)
+
+            questions.append({
+                'text': question_text,
+                'type': 'checkbox',
+                'options': options,
+                'required': True
+            })
+
+        # Check for text input questions (with underline)
+        elif '_' in line or '___' in line:
+            # Extract the question part before the underline
+            question_text = line.split('_')[0].strip()
+            question_text = clean_text(question_text)
+            if question_text.endswith('?'):
+                questions.append({
+                    'text': question_text,
+                    'type': 'text',
+                    'required': True
+                })
+
+        # Check for regular questions
+        elif line.endswith('?'):
+            # Check if it's a required question (marked with *)
+            required = '*' in line
+            question_text = line.replace('*', '').strip()
+            question_text = clean_text(question_text)
+
+            # Check if next line has options
+            if i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
+                options = []
+                while i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
+                    i += 1
+                    option_text = lines[i].strip()
+                    # Remove option markers and clean text
+                    option_text = option_text.split(')', 1)[1].strip() if ')' in option_text else option_text
+                    option_text = clean_text(option_text)
+                    options.append(option_text)
+
+                questions.append({
+                    'text': question_text,
+                    'type': 'multiple_choice',
+                    'options': options,
+                    'required': required
+                })
+            else:
+                questions.append({
+                    'text': question_text,
+                    'type': 'text',
+                    'required': required
+                })
+
+        i += 1
+
+    return questions
+
+def legacy_parse_questions_from_pages(page_texts):
+    questions = []
+    for text in page_texts:
+        questions.extend(legacy_parse_questions_from_text(text))
+    return questions
+
+def load_corpus():
+    """Return [(name, page texts, expected questions path)] for every corpus file"""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            pages = f.read().split('\f')
+        corpus.append((os.path.basename(path), pages, path[:-len('.txt')] + '.questions.json'))
+    return corpus
+
+def lines_per_second(parse, corpus, repeat):
+    line_count = sum(text.count('\n') + 1 for _, pages, _ in corpus for text in pages) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, pages, _ in corpus:
+            parse(pages)
+    return line_count / (time.perf_counter() - start), line_count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the corpus per measurement')
+    parser.add_argument('--update', action='store_true', help='Write the current output as the expected questions')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+
+    if args.update:
+        for name, pages, expected_path in corpus:
+            with open(expected_path, 'w', encoding='utf-8') as f:
+                json.dump(parse_questions_from_pages(pages), f, indent=2, ensure_ascii=False)
+                f.write('\n')
+            print(f"pinned {name}")
+        return
+
+    mismatches = 0
+    for name, pages, expected_path in corpus:
+        with open(expected_path, encoding='utf-8') as f:
+            expected = json.load(f)
+        questions = parse_questions_from_pages(pages)
+        if questions == expected:
+            print(f"ok        {name} ({len(questions)} questions)")
+        else:
+            mismatches += 1
+            print(f"MISMATCH  {name}: expected {len(expected)} questions, got {len(questions)}")
+            for index, (want, got) in enumerate(zip(expected, questions)):
+                if want != got:
+                    print(f"          first difference at question {index}:")
+                    print(f"          expected {want}")
+                    print(f"          got      {got}")
+                    break
+    if mismatches:
+        raise SystemExit(f"{mismatches} corpus files produced different questions")
+
+    legacy_rate, line_count = lines_per_second(legacy_parse_questions_from_pages, corpus, args.repeat)
+    current_rate, _ = lines_per_second(parse_questions_from_pages, corpus, args.repeat)
+    print(f"\n{line_count} lines parsed per run")
+    print(f"before (line-by-line scans)  {legacy_rate:>12,.0f} lines/sec")
+    print(f"after  (single pass)         {current_rate:>12,.0f} lines/sec  ({current_rate / legacy_rate:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark the response analytics summary against a large synthetic form
+
+Fills a throwaway SQLite database with a form of choice, checkbox and text
+questions and N responses spread over UTM sources, devices and companies, then
+times app.get_response_analytics():
+
+    first build   no stored summary yet, every response is aggregated
+    reload        the stored summary is loaded, e.g. by a freshly started worker
+    incremental   --new responses were submitted since the last summary
+    cached        nothing changed since the last summary
+
+With --verify the summary is checked against a plain Python count of the rows.
+
+Usage:
+    python benchmark_response_summary.py [--responses 1000000] [--new 1000] [--verify]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+UTM_SOURCES = ['google', 'facebook', 'newsletter', None]
+DEVICE_TYPES = ['desktop', 'mobile', 'tablet']
+QUESTIONS = [
+    ('How did you hear about us?', 'radio', ['Search', 'Friend', 'Ad', 'Other']),
+    ('Which products do you use?', 'checkbox', ['Forms', 'Quizzes', 'Exports', 'Postbacks', 'PDF import']),
+    ('How satisfied are you?', 'multiple_choice', ['Very', 'Somewhat', 'Not at all']),
+    ('What should we improve?', 'text', None),
+    ('Email', 'email', None),
+]
+
+def load_app(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    import app as app_module
+    return app_module
+
+def random_answer(rng, question_type, options):
+    if question_type == 'checkbox':
+        return ', '.join(rng.sample(options, rng.randint(1, 3)))
+    if options:
+        return rng.choice(options)
+    return f'answer {rng.randint(0, 10 ** 6)}'
+
+def populate(app_module, responses, seed=1):
+    """Create the benchmark form with `responses` responses, returns its ID"""
+    db = app_module.db
+    user = app_module.User(email='bench@example.com')
+    user.set_password('bench')
+    db.session.add(user)
+    companies = [app_module.Company(name=f'Company {i}', referral_code=f'bench{i}') for i in range(3)]
+    db.session.add_all(companies)
+    db.session.flush()
+    form = app_module.Form(title='Benchmark', user_id=user.id)
+    db.session.add(form)
+    db.session.flush()
+    for order, (text, question_type, options) in enumerate(QUESTIONS):
+        question = app_module.Question(form_id=form.id, question_text=text, question_type=question_type, order=order)
+        if options:
+            question.set_options(options)
+        db.session.add(question)
+    db.session.commit()
+    return append_responses(app_module, form.id, responses, seed)
+
+def append_responses(app_module, form_id, responses, seed):
+    db = app_module.db
+    rng = random.Random(seed)
+    company_ids = [company.id for company in app_module.Company.query] + [None]
+    questions = [
+        (question, question.question_type, question.get_options() or None)
+        for question in app_module.Question.query.filter_by(form_id=form_id).order_by(app_module.Question.order)
+    ]
+    response_table = app_module.Response.__table__
+    answer_table = app_module.Answer.__table__
+    next_id = (db.session.query(app_module.func.max(app_module.Response.id)).scalar() or 0) + 1
+    batch = 50000
+    for start in range(0, responses, batch):
+        count = min(batch, responses - start)
+        response_rows = []
+        answer_rows = []
+        for response_id in range(next_id, next_id + count):
+            response_rows.append({
+                'id': response_id,
+                'form_id': form_id,
+                'utm_source': rng.choice(UTM_SOURCES),
+                'device_type': rng.choice(DEVICE_TYPES),
+                'company_id': rng.choice(company_ids),
+            })
+            for question, question_type, options in questions:
+                # Optional questions are skipped now and then
+                if rng.random() < 0.8:
+                    answer_rows.append({
+                        'response_id': response_id,
+                        'question_id': question.id,
+                        'answer_text': random_answer(rng, question_type, options),
+                    })
+        db.session.execute(app_module.insert(response_table), response_rows)
+        db.session.execute(app_module.insert(answer_table), answer_rows)
+        db.session.commit()
+        next_id += count
+    return form_id
+
+def verify(app_module, form_id, summary):
+    """Recount the summary from the raw rows in Python"""
+    db = app_module.db
+    responses = db.session.query(app_module.Response.utm_source, app_module.Response.device_type).filter_by(form_id=form_id).all()
+    assert summary['total_responses'] == len(responses)
+    utm_sources = {}
+    for utm_source, _ in responses:
+        utm_sources[utm_source or 'none'] = utm_sources.get(utm_source or 'none', 0) + 1
+    assert summary['breakdowns']['utm_source'] == utm_sources
+
+    for question_summary in summary['questions']:
+        answers = [row.answer_text for row in db.session.query(app_module.Answer.answer_text).filter_by(question_id=question_summary['id'])]
+        assert question_summary['answered'] == len(answers)
+        if 'options' in question_summary:
+            counts = {}
+            for answer_text in answers:
+                for selection in (answer_text.split(', ') if question_summary['type'] == 'checkbox' else [answer_text]):
+                    counts[selection] = counts.get(selection, 0) + 1
+            assert {k: v for k, v in question_summary['options'].items() if v} == counts, question_summary['text']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=1000000, help='Responses in the benchmark form')
+    parser.add_argument('--new', type=int, default=1000, help='Responses submitted after the first summary')
+    parser.add_argument('--verify', action='store_true', help='Check the summary against a Python recount')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module = load_app(os.path.join(tmp, 'bench.db'))
+        with app_module.app.app_context():
+            app_module.db.create_all()
+            start = time.perf_counter()
+            form_id = populate(app_module, args.responses)
+            print(f"{args.responses} responses with {len(QUESTIONS)} questions loaded in {time.perf_counter() - start:.1f}s")
+
+            form = app_module.get_form_schema(form_id)
+            start = time.perf_counter()
+            app_module.get_response_analytics(form)
+            print(f"first build    {time.perf_counter() - start:8.3f}s")
+
+            app_module.response_summary_cache.invalidate(form_id)
+            start = time.perf_counter()
+            app_module.get_response_analytics(form)
+            print(f"reload         {time.perf_counter() - start:8.3f}s")
+
+            append_responses(app_module, form_id, args.new, seed=2)
+            start = time.perf_counter()
+            summary = app_module.get_response_analytics(form)
+            print(f"incremental    {time.perf_counter() - start:8.3f}s  ({args.new} new responses)")
+
+            start = time.perf_counter()
+            app_module.get_response_analytics(form)
+            print(f"cached         {time.perf_counter() - start:8.3f}s")
+
+            if args.verify:
+                verify(app_module, form_id, summary)
+                print("summary matches a recount of the rows")
+
+if __name__ == '__main__':
+    main()